@@ -0,0 +1,229 @@
+"""Artifact loading for the forecast service.
+
+The history table can be converted once into a directory of ``.npy`` column
+files that are opened with ``mmap_mode='r'``: loading is near-instant and
+forked uvicorn workers share the page cache instead of each unpickling its own
+copy. Rows are stored pre-sorted in ``SegmentIndex`` order so the index can
+use the mapped columns without copying them.
+
+The occupancy model can likewise be exported to LightGBM's native text format
+and loaded as a ``lightgbm.Booster``. Model and scaler are wrapped in
+``LazyArtifact`` so lightgbm/sklearn are only imported when the first forecast
+needs them.
+
+Either way the history is normalized by ``compact_history`` at load time:
+only the serving columns are kept, segment keys are int8, occupancy float32
+and dates int32 day ordinals. Distance stays float64: the forecast's
+distance tolerance must select exactly the rows it did on the original
+table, and float32 rounding moves values across its bounds. The training-feature means
+(the forecaster's imputation values) and ``base_year`` are computed before
+the other columns are dropped and kept in ``model_df.attrs``.
+
+Convert the pickles next to ``main.py`` with:
+
+    python -m artifacts convert
+"""
+import argparse
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+HISTORY_PICKLE = "Cluster_Demand_model_df.pkl"
+HISTORY_COLUMNS_DIR = "Cluster_Demand_model_df.columns"
+# Append-only log of rows ingested after the store was written; see history_store.
+HISTORY_UPDATES = "Cluster_Demand_model_df.updates"
+MODEL_PICKLE = "lgb_occupancy_model.pkl"
+MODEL_NATIVE = "lgb_occupancy_model.txt"
+SCALER_PICKLE = "scaler.pkl"
+
+# SegmentIndex sort order; the columnar store is written in this order.
+HISTORY_SORT_KEYS = ['starRating', 'propertyType_cat', 'distanceFromCenter', 'date']
+
+# Columns kept at serving time, with their compact dtypes.
+SERVING_DTYPES = {
+    'date': np.int32,  # day ordinal, see to_day_ordinals
+    'starRating': np.int8,
+    'propertyType_cat': np.int8,
+    'distanceFromCenter': np.float64,
+    'occupiedRooms': np.float32,
+}
+
+# date(1970, 1, 1).toordinal(): datetime64[D] counts days from there.
+_EPOCH_ORDINAL = 719163
+
+
+def to_day_ordinals(dates):
+    """``date.toordinal()`` of each date, as int32."""
+    days = np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+    return (days + _EPOCH_ORDINAL).astype(np.int32)
+
+
+def from_day_ordinals(ordinals):
+    """Inverse of ``to_day_ordinals``: midnight ``datetime64[ns]`` values."""
+    days = np.asarray(ordinals, dtype=np.int64) - _EPOCH_ORDINAL
+    return days.astype('datetime64[D]').astype('datetime64[ns]')
+
+
+def history_dates(model_df):
+    """The history's ``date`` column as ``datetime64[ns]``, compact or not."""
+    dates = model_df['date'].to_numpy()
+    if np.issubdtype(dates.dtype, np.integer):
+        return from_day_ordinals(dates)
+    return dates.astype('datetime64[ns]')
+
+
+def is_compact(model_df):
+    return 'feature_means' in model_df.attrs
+
+
+def frame_bytes(model_df):
+    return int(model_df.memory_usage(index=True, deep=True).sum())
+
+
+def compact_history(model_df):
+    """Serving-only copy of the history with compact dtypes; see the module docstring.
+
+    ``attrs['memory_bytes']`` records the footprint before and after.
+    """
+    if is_compact(model_df):
+        return model_df
+    before = frame_bytes(model_df)
+    dates = pd.to_datetime(model_df['date'])
+    means = model_df.mean(numeric_only=True)
+    compact = pd.DataFrame({
+        name: to_day_ordinals(dates) if name == 'date' else model_df[name].to_numpy(dtype=dtype)
+        for name, dtype in SERVING_DTYPES.items()
+    })
+    compact.attrs['feature_means'] = {name: float(value) for name, value in means.items()}
+    compact.attrs['base_year'] = int(dates.dt.year.min())
+    compact.attrs['memory_bytes'] = {'before': before, 'after': frame_bytes(compact)}
+    return compact
+
+
+class LazyArtifact:
+    """Proxy that loads the wrapped object on first attribute access."""
+
+    def __init__(self, loader, *args):
+        self._loader = loader
+        self._args = args
+        self._lock = threading.Lock()
+        self._value = None
+
+    def load(self):
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    self._value = self._loader(*self._args)
+        return self._value
+
+    @property
+    def loaded(self):
+        return self._value is not None
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
+
+def _joblib_load(path):
+    import joblib
+
+    return joblib.load(path)
+
+
+def write_history_columns(model_df, out_dir=HISTORY_COLUMNS_DIR):
+    """Write a compacted history as one ``.npy`` file per column plus a manifest.
+
+    Written to a temporary directory first and swapped into place, so
+    workers starting meanwhile map either the old store or the new one.
+    """
+    model_df = model_df.sort_values(HISTORY_SORT_KEYS, kind='stable', ignore_index=True)
+    tmp_dir = f"{out_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name in model_df.columns:
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), model_df[name].to_numpy())
+    with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+        json.dump({
+            "rows": len(model_df),
+            "columns": list(model_df.columns),
+            "sorted_by": HISTORY_SORT_KEYS,
+            "attrs": model_df.attrs,
+        }, f, indent=2)
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    os.replace(tmp_dir, out_dir)
+    return out_dir
+
+
+def convert_history(pickle_path=HISTORY_PICKLE, out_dir=HISTORY_COLUMNS_DIR):
+    """Write the compacted history pickle as a columnar store."""
+    return write_history_columns(compact_history(pd.read_pickle(pickle_path)), out_dir)
+
+
+def load_history(columns_dir=HISTORY_COLUMNS_DIR, pickle_path=HISTORY_PICKLE):
+    """The compacted history table, memory-mapped from ``columns_dir`` if converted, else unpickled."""
+    manifest_path = os.path.join(columns_dir, "manifest.json")
+    if not os.path.exists(manifest_path):
+        return compact_history(pd.read_pickle(pickle_path))
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    columns = {
+        name: np.load(os.path.join(columns_dir, f"{name}.npy"), mmap_mode='r')
+        for name in manifest["columns"]
+    }
+    # copy=False keeps one block per column, backed by the mapped file.
+    model_df = pd.DataFrame(columns, copy=False)
+    if "attrs" not in manifest:
+        print(f"Warning: {columns_dir} predates compact history columns; re-run `python -m artifacts convert`")
+        return compact_history(model_df)
+    model_df.attrs.update(manifest["attrs"])
+    stale = [name for name, dtype in SERVING_DTYPES.items() if name in columns and columns[name].dtype != dtype]
+    if stale:
+        print(f"Warning: {columns_dir} stores {', '.join(stale)} in an older dtype; re-run `python -m artifacts convert`")
+        model_df = model_df.astype({name: SERVING_DTYPES[name] for name in stale})
+    return model_df
+
+
+def export_native_model(pickle_path=MODEL_PICKLE, out_path=MODEL_NATIVE):
+    """Save the pickled LGBMRegressor's booster in LightGBM's native text format."""
+    _joblib_load(pickle_path).booster_.save_model(out_path)
+    return out_path
+
+
+def _load_model(native_path, pickle_path):
+    if os.path.exists(native_path):
+        import lightgbm
+
+        return lightgbm.Booster(model_file=native_path)
+    return _joblib_load(pickle_path)
+
+
+def load_model(native_path=MODEL_NATIVE, pickle_path=MODEL_PICKLE):
+    """Lazily loaded occupancy model: the native booster if exported, else the pickle."""
+    return LazyArtifact(_load_model, native_path, pickle_path)
+
+
+def load_scaler(pickle_path=SCALER_PICKLE):
+    """Lazily loaded feature scaler."""
+    return LazyArtifact(_joblib_load, pickle_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert forecast artifacts to fast-loading formats")
+    parser.add_argument("command", choices=["convert"])
+    parser.add_argument("--history", default=HISTORY_PICKLE)
+    parser.add_argument("--history-out", default=HISTORY_COLUMNS_DIR)
+    parser.add_argument("--model", default=MODEL_PICKLE)
+    parser.add_argument("--model-out", default=MODEL_NATIVE)
+    args = parser.parse_args()
+
+    print(f"History -> {convert_history(args.history, args.history_out)}")
+    print(f"Model   -> {export_native_model(args.model, args.model_out)}")
+
+
+if __name__ == "__main__":
+    main()
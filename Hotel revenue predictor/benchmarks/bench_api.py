@@ -0,0 +1,170 @@
+"""End-to-end benchmark of the forecast API on synthetic artifacts.
+
+Generates (or reuses) a synthetic history, properties CSV and stand-in model
+with ``benchmarks.synthetic``, imports ``main`` from that directory and
+measures, in-process:
+
+* ``forecast_segment_all_features`` called directly, one segment at a time;
+* the FastAPI endpoints through an ASGI transport, one request at a time and
+  with ``--concurrency`` requests in flight.
+
+Reports p50 / p99 latency, throughput and peak RSS per scenario as JSON, so
+runs can be diffed across commits. The forecast cache is disabled unless
+``--cache`` is given, so repeated requests measure the forecast itself.
+
+Run from the ``Hotel revenue predictor`` directory:
+
+    python -m benchmarks.bench_api --properties 200 --requests 200 --concurrency 8 > bench.json
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from benchmarks import synthetic
+from metrics import process_stats
+
+
+def summarize(latencies, elapsed):
+    latencies = np.asarray(latencies)
+    return {
+        'requests': int(len(latencies)),
+        'p50_ms': 1000 * float(np.percentile(latencies, 50)),
+        'p99_ms': 1000 * float(np.percentile(latencies, 99)),
+        'mean_ms': 1000 * float(latencies.mean()),
+        'throughput_rps': len(latencies) / elapsed,
+        'peak_rss_mb': process_stats()['peak_resident_memory_bytes'] / 2 ** 20,
+    }
+
+
+def bench_engine(main, records, horizon_days):
+    cutoff_date = datetime.datetime.today()
+    end_date = cutoff_date + datetime.timedelta(days=horizon_days)
+    latencies = []
+    start = time.perf_counter()
+    for record in records:
+        t0 = time.perf_counter()
+        main.forecast_segment_all_features(
+            *record.segment, model_df=main.model_df, cutoff_date=cutoff_date, end_date=end_date,
+            scaler=main.scaler, lgb_model=main.lgb_model, full_feature_cols=main.feature_columns,
+            X_train=main.model_df, holiday_dates=main.holiday_dates, tolerance=0.1,
+        )
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def bench_endpoint(client, method, path, bodies, concurrency):
+    """Send one request per body with at most ``concurrency`` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def one(body):
+        nonlocal failures
+        async with semaphore:
+            t0 = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - t0)
+            failures += response.status_code >= 400
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(body) for body in bodies))
+    return {**summarize(latencies, time.perf_counter() - start), 'failures': failures, 'concurrency': concurrency}
+
+
+async def bench_api(main, records, args):
+    import httpx
+
+    def forecast_body(i):
+        record = records[i % len(records)]
+        return {'property_id': record.property_id, 'adr': 100.0, 'horizon_days': args.horizon}
+
+    scenarios = {
+        'forecast_data': ('POST', '/forecast/data', forecast_body),
+        'properties_details': ('GET', '/properties/details', lambda i: None),
+        'forecast_batch': ('POST', '/forecast/batch', lambda i: {
+            'properties': [forecast_body(i * args.batch_size + j) for j in range(args.batch_size)],
+        }),
+    }
+    if args.render:
+        scenarios['forecast_rendered'] = ('POST', '/forecast', forecast_body)
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name, (method, path, body) in scenarios.items():
+            # Warm-up request so one-off costs (lazy loads, imports) are not timed.
+            await client.request(method, path, json=body(0))
+            bodies = [body(i) for i in range(args.requests)]
+            results[name] = {
+                'single': await bench_endpoint(client, method, path, bodies, 1),
+                'concurrent': await bench_endpoint(client, method, path, bodies, args.concurrency),
+            }
+    return results
+
+
+def git_revision(path):
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=path, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    repo_dir = os.getcwd()
+    artifacts = os.path.abspath(synthetic.generate(
+        args.artifacts, args.properties, args.days, args.estimators, args.seed,
+    ))
+    if not args.cache:
+        os.environ["FORECAST_CACHE_SIZE"] = "0"
+    os.environ.setdefault("FORECAST_STORE_DIR", os.path.join(artifacts, "forecast_store"))
+    # main loads its artifacts from the working directory at import time.
+    os.chdir(artifacts)
+    start = time.perf_counter()
+    import main
+    import_s = time.perf_counter() - start
+
+    rng = np.random.default_rng(args.seed)
+    records = [main.property_registry.records[i] for i in rng.permutation(len(main.property_registry))]
+    bench_engine(main, records[:1], args.horizon)
+
+    return {
+        'revision': git_revision(repo_dir),
+        'python': sys.version.split()[0],
+        'params': {k: v for k, v in vars(args).items() if k != 'artifacts'},
+        'import_s': import_s,
+        'engine': bench_engine(main, records[:args.requests], args.horizon),
+        'api': asyncio.run(bench_api(main, records, args)),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--properties', type=int, default=200)
+    parser.add_argument('--days', type=int, default=1095)
+    parser.add_argument('--estimators', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--artifacts', default="synthetic_artifacts")
+    parser.add_argument('--requests', type=int, default=100, help="Requests per scenario and load level")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--horizon', type=int, default=30)
+    parser.add_argument('--batch-size', type=int, default=20)
+    parser.add_argument('--render', action='store_true', help="Also benchmark /forecast (matplotlib + folium)")
+    parser.add_argument('--cache', action='store_true', help="Keep the forecast cache enabled")
+    args = parser.parse_args()
+
+    # Keep stdout for the JSON report; main prints load messages and warnings.
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run(args)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main_cli()
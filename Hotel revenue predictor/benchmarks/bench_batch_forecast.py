@@ -0,0 +1,62 @@
+"""Parity and throughput benchmark: lockstep batch forecasting vs one segment at a time.
+
+Run from the ``Hotel revenue predictor`` directory, next to the model artifacts:
+
+    python -m benchmarks.bench_batch_forecast --segments 200 --cutoff 2025-03-01
+"""
+import argparse
+import datetime
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+import main
+from benchmarks.bench_forecast_engine import sample_segments
+from forecast_engine import forecaster_for
+from segment_index import index_for
+
+
+def run(segments, cutoff_date, horizon_days):
+    end_date = cutoff_date + pd.Timedelta(days=horizon_days)
+    forecaster = forecaster_for(main.scaler, main.lgb_model, main.feature_columns, main.model_df, main.holiday_dates)
+    index = index_for(main.model_df)
+    histories = [index.history(*segment, cutoff_date) for segment in segments]
+    keep = [i for i, (dates, _) in enumerate(histories) if len(dates)]
+    segments = [segments[i] for i in keep]
+    histories = [histories[i] for i in keep]
+
+    start = time.perf_counter()
+    sequential = [forecaster.forecast_many([h], [s], cutoff_date, end_date)[1][0] for h, s in zip(histories, segments)]
+    sequential_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, lockstep, _ = forecaster.forecast_many(histories, segments, cutoff_date, end_date)
+    lockstep_s = time.perf_counter() - start
+
+    return {
+        'segments': len(segments),
+        'horizon_days': horizon_days,
+        'identical': bool(np.array_equal(np.vstack(sequential), lockstep)),
+        'sequential_ms': 1000 * sequential_s,
+        'lockstep_ms': 1000 * lockstep_s,
+        'segments_per_s': len(segments) / lockstep_s,
+        'speedup': sequential_s / lockstep_s,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--segments', type=int, default=200)
+    parser.add_argument('--horizon', type=int, default=30)
+    parser.add_argument('--cutoff', type=str, default=None, help="YYYY-MM-DD; defaults to now")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    cutoff_date = pd.Timestamp(args.cutoff) + pd.Timedelta(hours=12) if args.cutoff else datetime.datetime.today()
+    print(json.dumps(run(sample_segments(args.segments, args.seed), cutoff_date, args.horizon), indent=2))
+
+
+if __name__ == '__main__':
+    main_cli()
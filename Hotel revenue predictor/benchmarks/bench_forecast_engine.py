@@ -0,0 +1,95 @@
+"""Parity and latency benchmark: original per-day loop vs ``forecast_engine``.
+
+Run from the ``Hotel revenue predictor`` directory, next to the model artifacts:
+
+    python -m benchmarks.bench_forecast_engine --segments 20 --cutoff 2025-03-01
+"""
+import argparse
+import datetime
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+import main
+from benchmarks.reference import forecast_segment_reference, reference_inputs
+
+
+def sample_segments(n, seed):
+    props = main.properties_filtered_df.sample(frac=1.0, random_state=seed)
+    segments = []
+    for _, row in props.iterrows():
+        segment = (
+            int(row['Star Rating']),
+            main.property_type_mapping.get(row['Property Type'], -1),
+            float(row['Distance from Center']),
+        )
+        if segment not in segments:
+            segments.append(segment)
+        if len(segments) == n:
+            break
+    return segments
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def run(segments, cutoff_date, horizon_days):
+    end_date = cutoff_date + pd.Timedelta(days=horizon_days)
+    common = dict(
+        cutoff_date=cutoff_date, end_date=end_date, scaler=main.scaler, lgb_model=main.lgb_model,
+        holiday_dates=main.holiday_dates, tolerance=0.1,
+    )
+    reference_df, reference_X_train = reference_inputs(main.model_df)
+    reference_s, engine_s, max_abs_diff, compared = [], [], 0.0, 0
+    for star, ptype, distance in segments:
+        expected, t_ref = timed(
+            forecast_segment_reference, star, ptype, distance,
+            model_df=reference_df, X_train=reference_X_train,
+            feature_columns=main.feature_columns, **common,
+        )
+        actual, t_new = timed(
+            main.forecast_segment_all_features, star, ptype, distance,
+            model_df=main.model_df, X_train=main.model_df,
+            full_feature_cols=main.feature_columns, **common,
+        )
+        reference_s.append(t_ref)
+        engine_s.append(t_new)
+        if expected is None or actual is None:
+            assert expected is None and actual is None
+            continue
+        assert list(expected['date']) == list(actual['date'])
+        diff = np.abs(expected['occupied'].to_numpy() - actual['occupied'].to_numpy())
+        max_abs_diff = max(max_abs_diff, float(diff.max()))
+        compared += 1
+    return {
+        'segments': len(segments),
+        'compared': compared,
+        'horizon_days': horizon_days,
+        'max_abs_diff': max_abs_diff,
+        'reference_ms_mean': 1000 * float(np.mean(reference_s)),
+        'engine_ms_mean': 1000 * float(np.mean(engine_s)),
+        'speedup': float(np.sum(reference_s) / np.sum(engine_s)),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--segments', type=int, default=20)
+    parser.add_argument('--horizon', type=int, default=30)
+    parser.add_argument('--cutoff', type=str, default=None, help="YYYY-MM-DD; defaults to now")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    cutoff_date = pd.Timestamp(args.cutoff) + pd.Timedelta(hours=12) if args.cutoff else datetime.datetime.today()
+    # Warm up both paths so one-off costs (imports, engine setup) are not timed.
+    run(sample_segments(1, args.seed), cutoff_date, 2)
+    print(json.dumps(run(sample_segments(args.segments, args.seed), cutoff_date, args.horizon), indent=2))
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,84 @@
+"""Speed and accuracy of the recursive vs direct forecast strategies.
+
+Forecasts from a cutoff inside the history (by default the longest horizon
+before the last history date) so each horizon day can be scored against the
+segment's held-out actuals. Reports per-segment latency and MAE / RMSE / bias
+per strategy and horizon.
+
+Run from the ``Hotel revenue predictor`` directory, next to the model artifacts:
+
+    python -m benchmarks.bench_horizon --segments 50 --horizons 30 90 365
+"""
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+import main
+from benchmarks.bench_forecast_engine import sample_segments, timed
+from artifacts import history_dates
+from forecast_engine import STRATEGIES, forecaster_for
+from segment_index import index_for
+
+
+def held_out_actuals(segment, horizon):
+    """Mean actual occupancy of the segment on each horizon day (NaN where missing)."""
+    dates, occupied = index_for(main.model_df).actuals(*segment, horizon[0], horizon[-1])
+    daily = pd.Series(occupied, index=pd.DatetimeIndex(dates)).groupby(level=0).mean()
+    return daily.reindex(horizon).to_numpy()
+
+
+def run(segments, cutoff_date, horizons):
+    index = index_for(main.model_df)
+    histories = {segment: index.history(*segment, cutoff_date) for segment in segments}
+    segments = [segment for segment in segments if len(histories[segment][0])]
+    results = []
+    for horizon_days in horizons:
+        end_date = cutoff_date + pd.Timedelta(days=horizon_days)
+        for strategy in STRATEGIES:
+            forecaster = forecaster_for(
+                main.scaler, main.lgb_model, main.feature_columns, main.model_df, main.holiday_dates, strategy,
+            )
+            latencies, errors = [], []
+            for segment in segments:
+                (horizon, predictions, _), seconds = timed(
+                    forecaster.forecast_many, [histories[segment]], [segment], cutoff_date, end_date,
+                )
+                latencies.append(seconds)
+                actual = held_out_actuals(segment, horizon)
+                errors.append((predictions[0] - actual)[~np.isnan(actual)])
+            errors = np.concatenate(errors)
+            results.append({
+                'strategy': strategy,
+                'horizon_days': horizon_days,
+                'segment_ms_mean': 1000 * float(np.mean(latencies)),
+                'segment_ms_p99': 1000 * float(np.percentile(latencies, 99)),
+                'scored_days': int(len(errors)),
+                'mae': float(np.mean(np.abs(errors))) if len(errors) else None,
+                'rmse': float(np.sqrt(np.mean(errors ** 2))) if len(errors) else None,
+                'bias': float(np.mean(errors)) if len(errors) else None,
+            })
+    return {'segments': len(segments), 'cutoff_date': f"{cutoff_date:%Y-%m-%d}", 'results': results}
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--segments', type=int, default=50)
+    parser.add_argument('--horizons', type=int, nargs='+', default=[30, 90, 365])
+    parser.add_argument('--cutoff', type=str, default=None,
+                        help="YYYY-MM-DD; defaults to the longest horizon before the last history date")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.cutoff:
+        cutoff_date = pd.Timestamp(args.cutoff)
+    else:
+        cutoff_date = pd.Timestamp(history_dates(main.model_df).max()) - pd.Timedelta(days=max(args.horizons))
+    # Warm up both strategies so one-off costs are not timed.
+    run(sample_segments(1, args.seed), cutoff_date, [2])
+    print(json.dumps(run(sample_segments(args.segments, args.seed), cutoff_date, args.horizons), indent=2))
+
+
+if __name__ == '__main__':
+    main_cli()
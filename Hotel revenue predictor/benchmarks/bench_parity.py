@@ -0,0 +1,163 @@
+"""Parity and latency benchmark: Gradio app vs FastAPI service, native vs sklearn scoring.
+
+Generates (or reuses) synthetic artifacts with ``benchmarks.synthetic``,
+imports ``app`` and ``main`` from that directory and, for a sample of
+properties and both strategies, checks that:
+
+* ``app.forecast_by_property`` and ``POST /forecast/data`` report the same
+  room nights and revenue;
+* the native ``Booster.predict`` path (``forecast_engine.native_predictor``)
+  gives the same daily occupancy as ``scaler.transform`` + ``lgb_model.predict``.
+
+Reports the largest differences and mean latencies as JSON; exits non-zero
+when any total differs. Gradio itself is not needed.
+
+Run from the ``Hotel revenue predictor`` directory:
+
+    python -m benchmarks.bench_parity --properties 100 --samples 20
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import synthetic
+
+
+def sklearn_predictor(model):
+    """The scoring path the forecasters used before ``native_predictor``."""
+    scaler, lgb_model = model.scaler, model.lgb_model
+    wants_frame = getattr(scaler, 'feature_names_in_', None) is not None
+    columns = list(model.feature_columns)
+
+    def predict(X):
+        if wants_frame:
+            X = pd.DataFrame(X, columns=columns)
+        return lgb_model.predict(scaler.transform(X))
+
+    return predict
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+async def compare_uis(app, main, records, horizon_days, strategy, adr=100.0):
+    import httpx
+
+    mismatches, app_s, api_s = [], [], []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://parity", timeout=None) as client:
+        for record in records:
+            result, elapsed = timed(app.forecast_by_property, record.name, adr, horizon_days, strategy)
+            app_s.append(elapsed)
+            t0 = time.perf_counter()
+            response = await client.post('/forecast/data', json={
+                'property_id': record.property_id, 'adr': adr,
+                'horizon_days': horizon_days, 'strategy': strategy,
+            })
+            api_s.append(time.perf_counter() - t0)
+            if response.status_code != 200:
+                mismatches.append({'property_id': record.property_id, 'api_status': response.status_code})
+                continue
+            body = response.json()
+            app_totals = (int(result[1]), int(result[2])) if isinstance(result, tuple) and result[0] is not None else None
+            api_totals = (body['total_room_nights'], body['total_revenue'])
+            if app_totals != api_totals:
+                mismatches.append({'property_id': record.property_id, 'app': app_totals, 'api': list(api_totals)})
+    return {
+        'properties': len(records),
+        'mismatches': mismatches,
+        'app_mean_ms': 1000 * float(np.mean(app_s)),
+        'api_mean_ms': 1000 * float(np.mean(api_s)),
+    }
+
+
+def compare_predictors(main, records, horizon_days, strategy):
+    from forecast_engine import STRATEGIES
+
+    model = main.startup_model
+    cutoff_date = datetime.datetime.today()
+    end_date = cutoff_date + pd.Timedelta(days=horizon_days)
+    args = (model.scaler, model.lgb_model, model.feature_columns, main.model_df, main.holiday_dates)
+    native, baseline = STRATEGIES[strategy](*args), STRATEGIES[strategy](*args)
+    baseline._predict = sklearn_predictor(model)
+    index = main.index_for(main.model_df)
+
+    native_s, sklearn_s, max_abs_diff = [], [], 0.0
+    for segment in dict.fromkeys(record.segment for record in records):
+        hist_dates, hist_occupied = index.history(*segment, cutoff_date, 0.1)
+        if len(hist_dates) == 0:
+            continue
+        call = (hist_dates, hist_occupied, *segment, cutoff_date, end_date)
+        expected, t_sklearn = timed(baseline.forecast, *call)
+        actual, t_native = timed(native.forecast, *call)
+        sklearn_s.append(t_sklearn)
+        native_s.append(t_native)
+        diff = np.abs(expected['occupied'].to_numpy() - actual['occupied'].to_numpy())
+        max_abs_diff = max(max_abs_diff, float(diff.max(initial=0.0)))
+    return {
+        'segments': len(native_s),
+        'max_abs_diff': max_abs_diff,
+        'sklearn_mean_ms': 1000 * float(np.mean(sklearn_s)),
+        'native_mean_ms': 1000 * float(np.mean(native_s)),
+        'speedup': float(np.mean(sklearn_s) / np.mean(native_s)),
+    }
+
+
+def run(args):
+    artifacts = os.path.abspath(synthetic.generate(
+        args.artifacts, args.properties, args.days, args.estimators, args.seed,
+    ))
+    # Both UIs should compute, not read the API's cache or nightly store.
+    os.environ["FORECAST_CACHE_SIZE"] = "0"
+    os.environ["FORECAST_STORE_DIR"] = os.path.join(artifacts, "no_forecast_store")
+    os.chdir(artifacts)
+    import app
+    import main
+
+    rng = np.random.default_rng(args.seed)
+    records = [main.property_registry.records[i] for i in rng.permutation(len(main.property_registry))]
+    records = records[:args.samples]
+    # Warm-up so lazy loads and imports are not timed.
+    app.forecast_by_property(records[0].name, 100.0, args.horizon)
+
+    report = {'params': {k: v for k, v in vars(args).items() if k != 'artifacts'}}
+    for strategy in ('recursive', 'direct'):
+        report[strategy] = {
+            'uis': asyncio.run(compare_uis(app, main, records, args.horizon, strategy)),
+            'predictors': compare_predictors(main, records, args.horizon, strategy),
+        }
+    return report
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--properties', type=int, default=100)
+    parser.add_argument('--days', type=int, default=1095)
+    parser.add_argument('--estimators', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--artifacts', default="synthetic_artifacts")
+    parser.add_argument('--samples', type=int, default=20, help="Properties compared per strategy")
+    parser.add_argument('--horizon', type=int, default=30)
+    args = parser.parse_args()
+
+    # Keep stdout for the JSON report; main prints load messages and warnings.
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run(args)
+    print(json.dumps(report, indent=2))
+    if any(report[strategy]['uis']['mismatches'] for strategy in ('recursive', 'direct')):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,89 @@
+"""Parity and latency benchmark: full-table boolean masks vs ``SegmentIndex``.
+
+Run from the ``Hotel revenue predictor`` directory, next to the model artifacts:
+
+    python -m benchmarks.bench_segment_index --segments 200 --cutoff 2025-03-01
+"""
+import argparse
+import datetime
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+import main
+from benchmarks.bench_forecast_engine import sample_segments
+from benchmarks.reference import reference_inputs
+from segment_index import SegmentIndex
+
+
+def mask_history(model_df, star, ptype, distance, cutoff_date, tolerance=0.1):
+    hist = model_df[
+        (model_df['starRating'] == star) &
+        (model_df['propertyType_cat'] == ptype) &
+        (np.abs(model_df['distanceFromCenter'] - distance) <= tolerance) &
+        (model_df['date'] <= cutoff_date)
+    ].sort_values('date')
+    return hist['date'].to_numpy(), hist['occupiedRooms'].to_numpy(dtype=np.float64)
+
+
+def mask_actuals(model_df, star, ptype, distance, start_date, end_date):
+    actual = model_df[
+        (model_df['starRating'] == star) &
+        (model_df['propertyType_cat'] == ptype) &
+        (model_df['distanceFromCenter'] == distance) &
+        (model_df['date'] >= start_date) &
+        (model_df['date'] <= end_date)
+    ].sort_values('date', kind='stable')
+    return actual['date'].to_numpy(), actual['occupiedRooms'].to_numpy(dtype=np.float64)
+
+
+def run(segments, cutoff_date):
+    model_df, _ = reference_inputs(main.model_df)
+    start = time.perf_counter()
+    index = SegmentIndex(main.model_df)
+    build_s = time.perf_counter() - start
+
+    mask_s = index_s = 0.0
+    start_date = cutoff_date - pd.Timedelta(days=30)
+    for star, ptype, distance in segments:
+        t0 = time.perf_counter()
+        expected = (
+            mask_history(model_df, star, ptype, distance, cutoff_date),
+            mask_actuals(model_df, star, ptype, distance, start_date, cutoff_date),
+        )
+        t1 = time.perf_counter()
+        actual = (
+            index.history(star, ptype, distance, cutoff_date),
+            index.actuals(star, ptype, distance, start_date, cutoff_date),
+        )
+        t2 = time.perf_counter()
+        mask_s += t1 - t0
+        index_s += t2 - t1
+        for (exp_dates, exp_values), (act_dates, act_values) in zip(expected, actual):
+            assert np.array_equal(exp_dates, act_dates)
+            assert np.array_equal(exp_values, act_values, equal_nan=True)
+    return {
+        'rows': len(model_df),
+        'segments': len(segments),
+        'index_build_ms': 1000 * build_s,
+        'mask_us_per_lookup': 1e6 * mask_s / len(segments),
+        'index_us_per_lookup': 1e6 * index_s / len(segments),
+        'speedup': mask_s / index_s,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--segments', type=int, default=200)
+    parser.add_argument('--cutoff', type=str, default=None, help="YYYY-MM-DD; defaults to now")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    cutoff_date = pd.Timestamp(args.cutoff) + pd.Timedelta(hours=12) if args.cutoff else datetime.datetime.today()
+    print(json.dumps(run(sample_segments(args.segments, args.seed), cutoff_date), indent=2))
+
+
+if __name__ == '__main__':
+    main_cli()
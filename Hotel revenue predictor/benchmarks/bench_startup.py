@@ -0,0 +1,86 @@
+"""Cold-start and per-worker memory benchmark for ``main``.
+
+Starts ``--workers`` fresh interpreters side by side (like uvicorn workers),
+each importing ``main`` and serving one JSON forecast, and reports import
+time, first-forecast time, RSS and PSS per worker. PSS splits shared pages
+(e.g. the memory-mapped history) between the processes mapping them.
+
+Run from the ``Hotel revenue predictor`` directory, before and after
+``python -m artifacts convert`` to compare the two layouts:
+
+    python -m benchmarks.bench_startup --workers 4
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = r'''
+import json, sys, time
+
+def memory_kb():
+    usage = {}
+    try:
+        with open("/proc/self/status") as f:
+            usage.update((k, int(v.split()[0])) for k, v in (l.split(":", 1) for l in f) if k == "VmRSS")
+        with open("/proc/self/smaps_rollup") as f:
+            usage.update((k, int(v.split()[0])) for k, v in (l.split(":", 1) for l in f if ":" in l) if k == "Pss")
+    except OSError:
+        import resource
+        usage["VmRSS"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage
+
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+after_import = memory_kb()
+name = main.properties_filtered_df["Property Name"].astype(str).iloc[0]
+main.forecast_data_by_property_api(name, 100.0)
+forecasted = time.perf_counter()
+# Measure only once every worker is up, and stay alive until all have been
+# measured, so PSS reflects the pages they share.
+print("ready", flush=True)
+sys.stdin.readline()
+after_forecast = memory_kb()
+print(json.dumps({
+    "import_s": imported - start,
+    "first_forecast_s": forecasted - imported,
+    "rss_mb_after_import": after_import.get("VmRSS", 0) / 1024,
+    "rss_mb_after_forecast": after_forecast.get("VmRSS", 0) / 1024,
+    "pss_mb_after_forecast": after_forecast.get("Pss", 0) / 1024,
+}), flush=True)
+sys.stdin.readline()
+'''
+
+
+def run(workers):
+    procs = [
+        subprocess.Popen([sys.executable, "-c", PROBE], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        while proc.stdout.readline().strip() != "ready":
+            pass
+    for proc in procs:
+        proc.stdin.write("measure\n")
+        proc.stdin.flush()
+    results = [json.loads(proc.stdout.readline()) for proc in procs]
+    for proc in procs:
+        proc.communicate("")
+    return {
+        "workers": workers,
+        **{f"{key}_median": statistics.median(r[key] for r in results) for key in results[0]},
+        "per_worker": results,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    print(json.dumps(run(args.workers), indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,177 @@
+"""Check and time the Supabase /properties path against a local stand-in.
+
+Starts a stub of the Supabase REST endpoint (``/rest/v1/profiles``) on
+localhost, points ``SUPABASE_URL`` / ``SUPABASE_SERVICE_KEY`` at it and
+imports ``main`` from synthetic artifacts (``benchmarks.synthetic``). Inside
+the app's lifespan, so the pooled client is used, it walks the
+stale-while-revalidate cache through its states on a fake clock:
+
+* first call: a miss, fetched from the stub;
+* fresh: cache hits that never reach the stub (timed, p50 / p99);
+* stale: the old names at once while a background refresh fetches new ones;
+* stale with the stub failing: the old names are kept, the error counted;
+* expired with the stub failing: the CSV names loaded at startup.
+
+Reports the checks, upstream call counts and latencies as JSON; exits
+non-zero when a check fails.
+
+Run from the ``Hotel revenue predictor`` directory:
+
+    python -m benchmarks.bench_supabase --requests 1000
+"""
+import argparse
+import asyncio
+import contextlib
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from benchmarks import synthetic
+
+SERVICE_KEY = "stand-in-service-key"
+
+
+class StandIn(http.server.ThreadingHTTPServer):
+    """Answers ``GET /rest/v1/profiles`` with ``names``, or with ``status`` when it is not 200."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.names = []
+        self.status = 200
+        self.calls = 0
+        self.unauthorized = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.calls += 1
+        if not self.path.startswith("/rest/v1/profiles"):
+            status, body = 404, {"message": "not found"}
+        elif self.headers.get("apikey") != SERVICE_KEY or self.headers.get("Authorization") != f"Bearer {SERVICE_KEY}":
+            server.unauthorized += 1
+            status, body = 401, {"message": "bad key"}
+        elif server.status != 200:
+            status, body = server.status, {"message": "stand-in failure"}
+        else:
+            status, body = 200, [{"name": name} for name in server.names] + [{"name": None}]
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+async def exercise(main, stand_in, requests):
+    import httpx
+
+    now = [0.0]
+    cache = main.supabase_properties
+    cache._clock = lambda: now[0]
+    checks = {}
+
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://stand-in", timeout=None) as client:
+            async def properties():
+                response = await client.get('/properties')
+                return response.json()
+
+            stand_in.names = ["Alpha", "Beta"]
+            checks['miss_fetches'] = await properties() == ["Alpha", "Beta"] and stand_in.calls == 1
+
+            latencies = []
+            for _ in range(requests):
+                t0 = time.perf_counter()
+                body = await properties()
+                latencies.append(time.perf_counter() - t0)
+            checks['fresh_hits_stay_local'] = body == ["Alpha", "Beta"] and stand_in.calls == 1
+
+            # Stale: old names at once, the background refresh brings the new ones.
+            stand_in.names = ["Alpha", "Beta", "Gamma"]
+            now[0] += cache.fresh_seconds + 1
+            stale = await properties()
+            await cache._refresh_task
+            checks['stale_served_then_refreshed'] = (
+                stale == ["Alpha", "Beta"] and await properties() == ["Alpha", "Beta", "Gamma"] and stand_in.calls == 2
+            )
+
+            # A failing refresh keeps serving the last good names.
+            stand_in.status = 500
+            now[0] += cache.fresh_seconds + 1
+            stale = await properties()
+            with contextlib.suppress(Exception):
+                await cache._refresh_task
+            checks['failed_refresh_keeps_names'] = (
+                stale == ["Alpha", "Beta", "Gamma"] and cache.stats()['refresh_errors'] == 1
+            )
+
+            # Past the stale window the caller waits for the fetch, which fails: CSV names.
+            now[0] += cache.fresh_seconds + cache.stale_seconds + 1
+            checks['expired_falls_back_to_csv'] = await properties() == main.csv_property_names
+
+            checks['pooled_client'] = main.supabase_client is not None
+            checks['authorized'] = stand_in.unauthorized == 0
+
+    latencies = np.asarray(latencies)
+    return {
+        'checks': checks,
+        'upstream_calls': stand_in.calls,
+        'hit_p50_ms': 1000 * float(np.percentile(latencies, 50)),
+        'hit_p99_ms': 1000 * float(np.percentile(latencies, 99)),
+        'cache': cache.stats(),
+    }
+
+
+def run(args):
+    artifacts = os.path.abspath(synthetic.generate(
+        args.artifacts, args.properties, args.days, args.estimators, args.seed,
+    ))
+    stand_in = StandIn()
+    threading.Thread(target=stand_in.serve_forever, daemon=True).start()
+    os.environ["SUPABASE_URL"] = stand_in.url
+    os.environ["SUPABASE_SERVICE_KEY"] = SERVICE_KEY
+    os.chdir(artifacts)
+    import main
+
+    try:
+        report = asyncio.run(exercise(main, stand_in, args.requests))
+    finally:
+        stand_in.shutdown()
+    report['params'] = {k: v for k, v in vars(args).items() if k != 'artifacts'}
+    return report
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--properties', type=int, default=100)
+    parser.add_argument('--days', type=int, default=400)
+    parser.add_argument('--estimators', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--artifacts', default="synthetic_artifacts")
+    parser.add_argument('--requests', type=int, default=1000, help="Timed fresh cache hits")
+    args = parser.parse_args()
+
+    # Keep stdout for the JSON report; main prints load messages and warnings.
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run(args)
+    print(json.dumps(report, indent=2))
+    if not all(report['checks'].values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main_cli()
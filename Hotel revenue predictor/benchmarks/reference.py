@@ -0,0 +1,107 @@
+"""The original per-day forecasting loop, kept as the parity and speed baseline.
+
+This is ``forecast_segment_all_features`` as it was before ``forecast_engine``,
+with ``feature_columns`` passed explicitly instead of read from a module global.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from artifacts import HISTORY_PICKLE, history_dates, is_compact
+
+
+def reference_inputs(model_df, pickle_path=HISTORY_PICKLE):
+    """``(model_df, X_train)`` laid out as the original loop expects.
+
+    That is the raw history pickle when there is one, so parity is checked
+    against the original float64 columns rather than the compacted ones.
+    Otherwise a compacted history is expanded back: dates from day ordinals,
+    and the training-feature means handed over as a one-row frame (whose
+    ``mean`` is the means themselves).
+    """
+    if os.path.exists(pickle_path):
+        raw_df = pd.read_pickle(pickle_path)
+        return raw_df, raw_df
+    if not is_compact(model_df):
+        return model_df, model_df
+    print(f"Warning: no {pickle_path}; comparing against the compacted history")
+    # The loop writes float64 predictions into the occupancy column.
+    frame = model_df.astype({'occupiedRooms': np.float64})
+    frame['date'] = history_dates(model_df)
+    return frame, pd.DataFrame([model_df.attrs['feature_means']])
+
+
+def forecast_segment_reference(starRating, propertyType_cat, distanceFromCenter, model_df, cutoff_date, end_date, scaler, lgb_model, feature_columns, X_train, holiday_dates, tolerance=0.1):
+    """Forecasts occupancy for a given segment."""
+    cluster_hist = model_df[
+        (model_df['starRating'] == starRating) &
+        (model_df['propertyType_cat'] == propertyType_cat) &
+        (np.abs(model_df['distanceFromCenter'] - distanceFromCenter) <= tolerance) &
+        (model_df['date'] <= cutoff_date)
+    ].sort_values('date')
+
+    if cluster_hist.empty:
+        return None
+
+    extended_series = pd.DataFrame({'date': pd.date_range(start=cluster_hist['date'].min(), end=end_date)})
+    extended_series = extended_series.merge(cluster_hist[['date', 'occupiedRooms']], on='date', how='left').rename(columns={'occupiedRooms': 'occupied'})
+
+    for i in range(len(extended_series)):
+        current_date = extended_series.at[i, 'date']
+        if current_date <= pd.to_datetime(cutoff_date):
+            continue
+
+        day_of_week = current_date.dayofweek
+        day_of_year = current_date.timetuple().tm_yday
+        month = current_date.month
+        year = current_date.year
+
+        is_weekend = 1 if day_of_week in [4, 5] else 0
+        is_holiday = 1 if current_date in holiday_dates else 0
+
+        day_of_week_sin = np.sin(2 * np.pi * day_of_week / 7)
+        day_of_year_sin = np.sin(2 * np.pi * day_of_year / 365.25)
+        month_sin = np.sin(2 * np.pi * month / 12)
+        base_year = model_df['date'].dt.year.min()
+        year_scaled = year - base_year
+
+        lags = {}
+        for lag in [1, 7, 15]:
+            lags[f'lag_{lag}'] = extended_series.at[i - lag, 'occupied'] if i - lag >= 0 else np.nan
+
+        rolling_stats = {}
+        for window in [3, 7, 15]:
+            window_data = extended_series['occupied'].iloc[i - window:i] if i >= window else extended_series['occupied'].iloc[:i]
+            rolling_stats[f'rolling_{window}_mean'] = window_data.mean() if len(window_data) > 0 else np.nan
+            rolling_stats[f'rolling_{window}_std'] = window_data.std(ddof=0) if len(window_data) > 0 else np.nan
+
+        daily_change = extended_series.at[i, 'occupied'] - extended_series.at[i - 1, 'occupied'] if i > 0 and pd.notnull(extended_series.at[i - 1, 'occupied']) and pd.notnull(extended_series.at[i, 'occupied']) else np.nan
+
+        feature_vector = {
+            'starRating': starRating, 'distanceFromCenter': distanceFromCenter,
+            'day_of_week_sin': day_of_week_sin, 'day_of_year_sin': day_of_year_sin, 'month_sin': month_sin,
+            'year_scaled': year_scaled, 'is_weekend': is_weekend, 'is_holiday': is_holiday,
+            'lag_1': lags.get('lag_1', np.nan), 'lag_7': lags.get('lag_7', np.nan), 'lag_15': lags.get('lag_15', np.nan),
+            'rolling_3_mean': rolling_stats.get('rolling_3_mean', np.nan), 'rolling_3_std': rolling_stats.get('rolling_3_std', np.nan),
+            'rolling_7_mean': rolling_stats.get('rolling_7_mean', np.nan), 'rolling_7_std': rolling_stats.get('rolling_7_std', np.nan),
+            'rolling_15_mean': rolling_stats.get('rolling_15_mean', np.nan), 'rolling_15_std': rolling_stats.get('rolling_15_std', np.nan),
+            'daily_change': daily_change,
+        }
+        for j in range(10):
+            feature_vector[f'prop_type_{j}'] = 1 if propertyType_cat == j else 0
+
+        features = pd.DataFrame([feature_vector])
+        features = features.reindex(columns=feature_columns)
+        features.fillna(X_train.mean(numeric_only=True), inplace=True)
+        features_scaled = scaler.transform(features)
+        pred = lgb_model.predict(features_scaled)[0]
+        extended_series.at[i, 'occupied'] = pred
+        if i > 0:
+            extended_series.at[i, 'daily_change'] = pred - extended_series.at[i - 1, 'occupied']
+
+    future_df = extended_series[extended_series['date'] > pd.to_datetime(cutoff_date)].copy()
+    future_df['starRating'] = starRating
+    future_df['distanceFromCenter'] = distanceFromCenter
+    future_df['propertyType_cat'] = propertyType_cat
+    return future_df
@@ -0,0 +1,164 @@
+"""Synthetic stand-ins for the Git LFS artifacts, for offline benchmarking.
+
+Writes a directory that ``main`` can be imported from: a history table with
+the real columns (date, starRating, propertyType_cat, distanceFromCenter,
+occupiedRooms plus the training features), a properties CSV whose rows map
+onto its segments, and a small LightGBM model and scaler trained on
+``FEATURE_COLUMNS``. Occupancy is weekly + yearly seasonality, a holiday
+bump and noise, so forecasts have structure to follow.
+
+    python -m benchmarks.synthetic --properties 200 --days 1095 --out synthetic_artifacts
+"""
+import argparse
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from calendar_table import WEEKEND_DAYS, read_holidays
+from forecast_engine import LAGS, PROP_TYPE_DUMMIES, ROLLING_WINDOWS
+
+# The columns the occupancy model was trained on, in ``feature_columns.pkl`` order.
+FEATURE_COLUMNS = [
+    'starRating', 'distanceFromCenter',
+    'day_of_week_sin', 'day_of_year_sin', 'month_sin', 'year_scaled', 'is_weekend', 'is_holiday',
+    *[f'lag_{lag}' for lag in LAGS],
+    *[f'rolling_{size}_{stat}' for size in ROLLING_WINDOWS for stat in ('mean', 'std')],
+    'daily_change',
+    *[f'prop_type_{j}' for j in range(PROP_TYPE_DUMMIES)],
+]
+
+PROPERTY_TYPES = {
+    'Hotel': 9, 'Homestay': 7, 'Guest House': 5, 'Resort': 11,
+    'Hostel': 8, 'BnB': 2, 'Villa': 12, 'Apartment': 1,
+    'Apart-hotel': 0, 'Holiday Home': 6, 'Cottage': 3,
+    'Lodge': 10, 'Farm House': 4,
+}
+
+HOLIDAY_FILE = "holidays_2022_2025.json"
+
+
+def synthetic_properties(n_properties, rng):
+    """Properties CSV rows; several properties share a segment, as in the real data."""
+    n_segments = max(1, n_properties // 3)
+    segments = pd.DataFrame({
+        'Star Rating': rng.integers(0, 6, n_segments),
+        'Property Type': rng.choice(list(PROPERTY_TYPES), n_segments),
+        'Distance from Center': np.round(rng.gamma(2.0, 1.5, n_segments), 3),
+    }).drop_duplicates(ignore_index=True)
+    rows = segments.iloc[rng.integers(0, len(segments), n_properties)].reset_index(drop=True)
+    rows.insert(0, 'Property ID', np.arange(1_000_000_000, 1_000_000_000 + n_properties).astype(str))
+    rows.insert(1, 'Property Name', [f"Synthetic Property {i}" for i in range(n_properties)])
+    rows['Latitude'] = 25.3176 + rng.normal(0, 0.02, n_properties)
+    rows['Longitude'] = 82.9739 + rng.normal(0, 0.02, n_properties)
+    return rows
+
+
+def synthetic_history(properties, days, holiday_dates, rng, end_date=None):
+    """One history row per segment and day, ending the day before ``end_date`` (default today)."""
+    end_date = pd.Timestamp(end_date or pd.Timestamp.today()).normalize() - pd.Timedelta(days=1)
+    dates = pd.date_range(end=end_date, periods=days)
+    segments = properties[['Star Rating', 'Property Type', 'Distance from Center']].drop_duplicates()
+
+    frames = []
+    is_holiday = dates.isin(holiday_dates).astype(np.float64)
+    weekly = np.isin(dates.dayofweek, WEEKEND_DAYS) * 4.0
+    yearly = 3.0 * np.sin(2 * np.pi * dates.dayofyear.to_numpy() / 365.25)
+    for star, ptype, distance in segments.itertuples(index=False):
+        level = 5.0 + 2.0 * star + 8.0 / (1.0 + distance)
+        occupied = level + weekly + yearly + 5.0 * is_holiday + rng.normal(0, 1.5, days)
+        frames.append(pd.DataFrame({
+            'date': dates,
+            'starRating': int(star),
+            'propertyType_cat': PROPERTY_TYPES[ptype],
+            'distanceFromCenter': float(distance),
+            'occupiedRooms': np.maximum(np.round(occupied), 0.0),
+        }))
+    model_df = pd.concat(frames, ignore_index=True)
+    return add_training_features(model_df, holiday_dates)
+
+
+def add_training_features(model_df, holiday_dates):
+    """The per-row training features, computed like the forecast loop computes them."""
+    dates = model_df['date'].dt
+    base_year = dates.year.min()
+    model_df['day_of_week_sin'] = np.sin(2 * np.pi * dates.dayofweek / 7)
+    model_df['day_of_year_sin'] = np.sin(2 * np.pi * dates.dayofyear / 365.25)
+    model_df['month_sin'] = np.sin(2 * np.pi * dates.month / 12)
+    model_df['year_scaled'] = dates.year - base_year
+    model_df['is_weekend'] = dates.dayofweek.isin(WEEKEND_DAYS).astype(int)
+    model_df['is_holiday'] = model_df['date'].isin(holiday_dates).astype(int)
+
+    by_segment = model_df.groupby(['starRating', 'propertyType_cat', 'distanceFromCenter'], sort=False)['occupiedRooms']
+    for lag in LAGS:
+        model_df[f'lag_{lag}'] = by_segment.shift(lag)
+    shifted = by_segment.shift(1)
+    keys = [model_df['starRating'], model_df['propertyType_cat'], model_df['distanceFromCenter']]
+    for size in ROLLING_WINDOWS:
+        rolling = shifted.groupby(keys, sort=False).rolling(size, min_periods=1)
+        model_df[f'rolling_{size}_mean'] = rolling.mean().reset_index(level=[0, 1, 2], drop=True)
+        model_df[f'rolling_{size}_std'] = rolling.std(ddof=0).reset_index(level=[0, 1, 2], drop=True)
+    model_df['daily_change'] = by_segment.diff()
+    for j in range(PROP_TYPE_DUMMIES):
+        model_df[f'prop_type_{j}'] = (model_df['propertyType_cat'] == j).astype(int)
+    return model_df
+
+
+def train_stand_in(model_df, n_estimators=50, seed=0):
+    """A small LGBMRegressor and StandardScaler over ``FEATURE_COLUMNS``."""
+    import lightgbm
+    from sklearn.preprocessing import StandardScaler
+
+    X = model_df[FEATURE_COLUMNS].fillna(model_df[FEATURE_COLUMNS].mean())
+    scaler = StandardScaler().fit(X)
+    model = lightgbm.LGBMRegressor(n_estimators=n_estimators, num_leaves=15, random_state=seed, verbose=-1)
+    model.fit(scaler.transform(X), model_df['occupiedRooms'])
+    return scaler, model
+
+
+def generate(out_dir, n_properties=200, days=1095, n_estimators=50, seed=0, source_dir="."):
+    """Write every artifact ``main`` loads into ``out_dir``; reuses it if the parameters match."""
+    import joblib
+
+    params = {"properties": n_properties, "days": days, "n_estimators": n_estimators, "seed": seed,
+              "end_date": pd.Timestamp.today().strftime("%Y-%m-%d")}
+    manifest_path = os.path.join(out_dir, "synthetic.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            if json.load(f) == params:
+                return out_dir
+
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    shutil.copy(os.path.join(source_dir, HOLIDAY_FILE), os.path.join(out_dir, HOLIDAY_FILE))
+    holiday_dates = read_holidays([os.path.join(out_dir, HOLIDAY_FILE)])['date'].unique()
+
+    properties = synthetic_properties(n_properties, rng)
+    model_df = synthetic_history(properties, days, holiday_dates, rng)
+    scaler, model = train_stand_in(model_df, n_estimators, seed)
+
+    properties.to_csv(os.path.join(out_dir, "CTVNS_Properties.csv"), index=False)
+    model_df.to_pickle(os.path.join(out_dir, "Cluster_Demand_model_df.pkl"))
+    joblib.dump(model, os.path.join(out_dir, "lgb_occupancy_model.pkl"))
+    joblib.dump(scaler, os.path.join(out_dir, "scaler.pkl"))
+    joblib.dump(FEATURE_COLUMNS, os.path.join(out_dir, "feature_columns.pkl"))
+    with open(manifest_path, "w") as f:
+        json.dump(params, f, indent=2)
+    return out_dir
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--properties', type=int, default=200)
+    parser.add_argument('--days', type=int, default=1095)
+    parser.add_argument('--estimators', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default="synthetic_artifacts")
+    args = parser.parse_args()
+    print(generate(args.out, args.properties, args.days, args.estimators, args.seed))
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,260 @@
+"""Precomputed calendar features, indexed by day ordinal.
+
+Every calendar feature the occupancy model uses (day-of-week / day-of-year /
+month sin terms, the year, is_weekend, is_holiday) plus the holiday type is
+computed once for a contiguous range of days. Row ``i`` holds day
+``first_ordinal + i`` (``date.toordinal()``), so a horizon's features are one
+slice per column instead of per-day ``timetuple`` / ``np.sin`` / set lookups.
+
+Holidays come from every file matching ``HOLIDAY_GLOB`` (e.g.
+``holidays_2022_2025.json``, ``holidays_2026_2027.json``): records with
+``date``, ``name`` and ``type``. ``HolidayCalendar`` re-checks the files at
+most every ``check_seconds`` and rebuilds the table when one is added,
+removed or modified, so dropping in next year's file needs no restart; a
+file that cannot be read or parsed keeps the previous table until the next
+check.
+``version`` is a digest of the holidays themselves; forecast cache keys and
+nightly-store manifests carry it, so a reload is never served forecasts made
+with the old holidays.
+"""
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+HOLIDAY_GLOB = "holidays_*.json"
+WEEKEND_DAYS = (4, 5)
+
+# Holiday type codes start at 1 (0 is "no holiday"); known types come first, in
+# priority order, so a day listed under several types keeps the lowest code.
+HOLIDAY_TYPES = ('Gazetted', 'Restricted')
+
+# Days past the last holiday year (and past today) the table covers up front;
+# horizons beyond it extend the table on demand.
+EXTRA_YEARS = 2
+
+
+def read_holidays(paths):
+    """``date`` / ``type`` frame of every holiday record in ``paths``."""
+    records = []
+    for path in paths:
+        with open(path) as f:
+            records.extend(json.load(f))
+    holidays = pd.DataFrame(records, columns=['date', 'type'])
+    holidays['date'] = pd.to_datetime(holidays['date']).dt.normalize()
+    holidays['type'] = holidays['type'].fillna('').astype(str)
+    return holidays
+
+
+def holidays_version(holidays):
+    """Short digest of a holiday frame's dates and types, the same in every process."""
+    holidays = holidays.sort_values(['date', 'type'], kind='stable')
+    digest = hashlib.sha1(holidays['date'].to_numpy(dtype='datetime64[ns]').tobytes())
+    digest.update("\0".join(holidays['type']).encode())
+    return digest.hexdigest()[:12]
+
+
+class CalendarTable:
+    """Calendar feature columns for every day from ``first_day`` to ``last_day``."""
+
+    def __init__(self, holidays, first_day, last_day):
+        days = pd.date_range(pd.Timestamp(first_day).normalize(), pd.Timestamp(last_day).normalize())
+        self.first_ordinal = days[0].toordinal()
+        self.last_ordinal = days[-1].toordinal()
+
+        day_of_week = days.dayofweek.to_numpy()
+        self.columns = {
+            'day_of_week_sin': np.sin(2 * np.pi * day_of_week / 7),
+            'day_of_year_sin': np.sin(2 * np.pi * days.dayofyear.to_numpy() / 365.25),
+            'month_sin': np.sin(2 * np.pi * days.month.to_numpy() / 12),
+            'is_weekend': np.isin(day_of_week, WEEKEND_DAYS).astype(np.float64),
+        }
+        self.year = days.year.to_numpy().astype(np.float64)
+
+        seen = sorted(set(holidays['type']) - set(HOLIDAY_TYPES))
+        self.holiday_types = HOLIDAY_TYPES + tuple(seen)
+        codes = {name: code for code, name in enumerate(self.holiday_types, start=1)}
+        self.holiday_type = np.zeros(len(days), dtype=np.int8)
+        rows = (holidays['date'] - days[0]).dt.days.to_numpy()
+        inside = (rows >= 0) & (rows < len(days))
+        # Write lowest priority first so the highest-priority type of a day wins.
+        type_codes = holidays['type'].map(codes).to_numpy()[inside]
+        order = np.argsort(-type_codes, kind='stable')
+        self.holiday_type[rows[inside][order]] = type_codes[order]
+        self.columns['is_holiday'] = (self.holiday_type > 0).astype(np.float64)
+
+        self.holiday_years = frozenset(holidays['date'].dt.year.tolist())
+        self.holiday_dates = pd.DatetimeIndex(np.sort(holidays['date'].unique()))
+
+    def __len__(self):
+        return self.last_ordinal - self.first_ordinal + 1
+
+    def covers(self, first_day, last_day):
+        return (
+            pd.Timestamp(first_day).toordinal() >= self.first_ordinal
+            and pd.Timestamp(last_day).toordinal() <= self.last_ordinal
+        )
+
+    def rows(self, first_day, n_days):
+        start = pd.Timestamp(first_day).toordinal() - self.first_ordinal
+        return slice(start, start + n_days)
+
+    def features(self, first_day, n_days, base_year):
+        """Calendar features of ``n_days`` consecutive days starting at ``first_day``."""
+        rows = self.rows(first_day, n_days)
+        features = {name: values[rows] for name, values in self.columns.items()}
+        features['year_scaled'] = self.year[rows] - base_year
+        return features
+
+    def holiday_type_names(self, first_day, n_days):
+        """Holiday type of each day (None on ordinary days)."""
+        names = (None,) + self.holiday_types
+        return [names[code] for code in self.holiday_type[self.rows(first_day, n_days)]]
+
+
+def _table_range(holidays, first_day=None, last_day=None):
+    years = holidays['date'].dt.year
+    today = pd.Timestamp.today().normalize()
+    first_year = min(years.min() if len(years) else today.year, today.year - EXTRA_YEARS)
+    last_year = max(years.max() if len(years) else today.year, today.year) + EXTRA_YEARS
+    first = pd.Timestamp(year=int(first_year), month=1, day=1)
+    last = pd.Timestamp(year=int(last_year), month=12, day=31)
+    if first_day is not None:
+        first = min(first, pd.Timestamp(first_day).normalize())
+    if last_day is not None:
+        last = max(last, pd.Timestamp(last_day).normalize())
+    return first, last
+
+
+class HolidayCalendar:
+    """``CalendarTable`` over the holiday files matching ``pattern``, rebuilt when they change.
+
+    With ``holidays`` (a frame as ``read_holidays`` returns) and no
+    ``pattern``, the calendar is static.
+    """
+
+    def __init__(self, pattern=HOLIDAY_GLOB, check_seconds=60.0, holidays=None, clock=time.monotonic):
+        self.pattern = pattern
+        self.check_seconds = check_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._holidays = holidays
+        self._signature = None
+        self._checked_at = None
+        self._warned_years = set()
+        self.reloads = 0
+        self.reload_errors = 0
+        self._table = None
+        self._version = None
+        self._maybe_reload(force=True)
+
+    @classmethod
+    def from_dates(cls, dates):
+        """Static calendar over a plain collection of holiday dates (type unknown)."""
+        dates = pd.to_datetime(pd.Series(sorted(dates), dtype='datetime64[ns]')).dt.normalize()
+        return cls(pattern=None, holidays=pd.DataFrame({'date': dates, 'type': ''}))
+
+    def _files(self):
+        paths = sorted(glob.glob(self.pattern))
+        stats = [os.stat(path) for path in paths]
+        return paths, tuple((path, st.st_mtime_ns, st.st_size) for path, st in zip(paths, stats))
+
+    def _maybe_reload(self, force=False):
+        if self.pattern is None:
+            if self._table is None:
+                self._table = CalendarTable(self._holidays, *_table_range(self._holidays))
+                self._version = holidays_version(self._holidays)
+            return
+        now = self._clock()
+        if not force and self._checked_at is not None and now - self._checked_at < self.check_seconds:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                paths, signature = self._files()
+                if signature == self._signature and self._table is not None:
+                    return
+                holidays = read_holidays(paths)
+                table = CalendarTable(holidays, *_table_range(holidays))
+            except (OSError, ValueError, TypeError, KeyError) as e:
+                # A half-copied or malformed file: keep serving the previous
+                # table and retry on the next check. Nothing to serve yet is fatal.
+                if self._table is None:
+                    raise
+                self.reload_errors += 1
+                print(f"Warning: could not reload holidays from {self.pattern}, keeping the previous calendar: {e}")
+                return
+            self._table = table
+            self._holidays = holidays
+            self._version = holidays_version(holidays)
+            self._signature = signature
+            self._warned_years.clear()
+            self.reloads += 1
+
+    def table(self, first_day=None, last_day=None):
+        """The current table, extended if it does not cover ``first_day``..``last_day``."""
+        self._maybe_reload()
+        table = self._table
+        if first_day is not None and not table.covers(first_day, last_day):
+            with self._lock:
+                table = self._table
+                if not table.covers(first_day, last_day):
+                    table = CalendarTable(self._holidays, *_table_range(self._holidays, first_day, last_day))
+                    self._table = table
+        return table
+
+    def features(self, first_day, n_days, base_year):
+        """Calendar features of a horizon; see ``CalendarTable.features``."""
+        last_day = pd.Timestamp(first_day) + pd.Timedelta(days=n_days - 1)
+        table = self.table(first_day, last_day)
+        missing = set(range(pd.Timestamp(first_day).year, last_day.year + 1)) - table.holiday_years - self._warned_years
+        if missing and self.pattern is not None:
+            self._warned_years.update(missing)
+            print(f"Warning: no holiday file covers {', '.join(map(str, sorted(missing)))}; "
+                  f"is_holiday is 0 for those years. Add a file matching {self.pattern}.")
+        return table.features(first_day, n_days, base_year)
+
+    def holiday_type_names(self, first_day, n_days):
+        """Holiday type of each day of a horizon; see ``CalendarTable.holiday_type_names``."""
+        last_day = pd.Timestamp(first_day) + pd.Timedelta(days=n_days - 1)
+        return self.table(first_day, last_day).holiday_type_names(first_day, n_days)
+
+    @property
+    def version(self):
+        """Digest of the current holidays (reloaded first if the files changed)."""
+        self._maybe_reload()
+        return self._version
+
+    @property
+    def holiday_dates(self):
+        return self.table().holiday_dates
+
+    def __contains__(self, day):
+        day = pd.Timestamp(day)
+        table = self.table(day, day)
+        return bool(table.columns['is_holiday'][day.toordinal() - table.first_ordinal])
+
+    def stats(self):
+        table = self._table
+        return {
+            "files": [path for path, _, _ in self._signature or ()],
+            "holidays": len(table.holiday_dates),
+            "holiday_years": sorted(table.holiday_years),
+            "first_day": pd.Timestamp.fromordinal(table.first_ordinal).strftime("%Y-%m-%d"),
+            "last_day": pd.Timestamp.fromordinal(table.last_ordinal).strftime("%Y-%m-%d"),
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "version": self._version,
+        }
+
+
+def as_calendar(holiday_dates):
+    """``holiday_dates`` itself if it is a ``HolidayCalendar``, else a static one over the dates."""
+    if isinstance(holiday_dates, HolidayCalendar):
+        return holiday_dates
+    return HolidayCalendar.from_dates(holiday_dates)
@@ -0,0 +1,80 @@
+"""In-process LRU + TTL cache for segment forecasts.
+
+Every property of a segment gets the same occupancy curve for a given cutoff
+day; only the ADR-dependent revenue differs. Keys are tuples that start with
+the segment and end with the cutoff date, so entries can be dropped per
+segment or per cutoff when the model or history changes.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class ForecastCache:
+    """Thread-safe LRU cache with a per-entry time to live."""
+
+    def __init__(self, maxsize=1024, ttl_seconds=3600.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached value, or None on a miss or an expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._clock() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, match=None):
+        """Drop every entry whose key satisfies ``match`` (all entries if None); returns the count."""
+        with self._lock:
+            keys = [key for key in self._entries if match is None or match(key)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def combined_stats(stats):
+    """One ``ForecastCache.stats`` dict for several caches (e.g. one per worker process)."""
+    stats = list(stats)
+    total = {key: sum(s[key] for s in stats) for key in ("size", "maxsize", "hits", "misses", "evictions")}
+    lookups = total["hits"] + total["misses"]
+    return {
+        **total,
+        "ttl_seconds": stats[0]["ttl_seconds"],
+        "hit_ratio": total["hits"] / lookups if lookups else 0.0,
+        "processes": len(stats),
+    }
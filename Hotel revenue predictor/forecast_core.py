@@ -0,0 +1,112 @@
+"""Forecasting core shared by the FastAPI service (main.py) and the Gradio app (app.py).
+
+Both front ends read the property catalog, forecast a segment and scale
+its actual / forecast curves through here, so a property gets the same
+room nights and revenue from either UI. Each keeps only its own plumbing
+around it: main.py adds caching, the nightly store, the model registry
+and the executor; app.py calls straight through.
+
+Prediction goes through ``forecast_engine``, whose forecasters score with
+the LightGBM booster directly (``native_predictor``).
+"""
+import numpy as np
+import pandas as pd
+
+from forecast_engine import forecaster_for
+from metrics import stage
+from segment_index import index_for
+
+PROPERTIES_CSV = 'CTVNS_Properties.csv'
+PROPERTY_COLUMNS = ['Property Name', 'Property ID', 'Star Rating', 'Property Type', 'Distance from Center', 'Latitude', 'Longitude']
+
+PROPERTY_TYPE_MAPPING = {
+    'Hotel': 9, 'Homestay': 7, 'Guest House': 5, 'Resort': 11,
+    'Hostel': 8, 'BnB': 2, 'Villa': 12, 'Apartment': 1,
+    'Apart-hotel': 0, 'Holiday Home': 6, 'Cottage': 3,
+    'Lodge': 10, 'Farm House': 4
+}
+
+# Days of actuals shown before the cutoff.
+ACTUAL_DAYS = 30
+# Segment occupancy -> property room nights.
+OCCUPANCY_SCALE = 1.75
+
+
+def load_properties(path=PROPERTIES_CSV):
+    """The property catalog, reduced to the columns the forecasts use."""
+    return pd.read_csv(path)[PROPERTY_COLUMNS].copy()
+
+
+def forecast_segment_all_features(starRating, propertyType_cat, distanceFromCenter, model_df, cutoff_date, end_date, scaler, lgb_model, full_feature_cols, X_train, holiday_dates, tolerance=0.1, strategy="recursive", model=None):
+    """Forecasts occupancy for a given segment.
+
+    With ``model`` (a ``ModelVersion``) its forecaster is used and the
+    scaler / booster / feature arguments are ignored.
+    """
+    with stage("history"):
+        hist_dates, hist_occupied = index_for(model_df).history(
+            starRating, propertyType_cat, distanceFromCenter, cutoff_date, tolerance
+        )
+
+    if len(hist_dates) == 0:
+        print(f"Warning: No historical data found for segment ({starRating}, {propertyType_cat}, {distanceFromCenter}) up to {cutoff_date}.")
+        return None
+
+    with stage("predict"):
+        if model is not None:
+            forecaster = model.forecaster(X_train, holiday_dates, strategy)
+        else:
+            forecaster = forecaster_for(scaler, lgb_model, full_feature_cols, X_train, holiday_dates, strategy)
+        return forecaster.forecast(
+            hist_dates, hist_occupied,
+            starRating, propertyType_cat, distanceFromCenter,
+            cutoff_date, end_date,
+        )
+
+
+def scale_actuals(occupied):
+    """Actual room nights per day."""
+    return np.ceil(np.asarray(occupied, dtype=np.float64) * OCCUPANCY_SCALE)
+
+
+def scaled_occupancy(occupied):
+    """Forecast room nights per day: the forecast is rounded up before scaling."""
+    return np.ceil(np.ceil(np.asarray(occupied, dtype=np.float64)) * OCCUPANCY_SCALE)
+
+
+def actual_frame(model_df, segment, cutoff_date):
+    """Scaled actuals of the ``ACTUAL_DAYS`` before the cutoff."""
+    with stage("actuals"):
+        dates, occupied = index_for(model_df).actuals(
+            *segment, cutoff_date - pd.Timedelta(days=ACTUAL_DAYS), cutoff_date
+        )
+    return pd.DataFrame({'date': dates, 'occupied': scale_actuals(occupied), 'source': 'Actual'})
+
+
+def forecast_frame(future_df):
+    """Scaled copy of a segment forecast, labelled for plotting next to the actuals."""
+    return pd.DataFrame({
+        'date': future_df['date'].to_numpy(),
+        'occupied': scaled_occupancy(future_df['occupied']),
+        'source': 'Forecast',
+    })
+
+
+def forecast_totals(future_df, adr):
+    """``(room_nights, revenue)`` of a scaled forecast frame."""
+    room_nights = int(future_df['occupied'].sum())
+    return room_nights, int(room_nights * adr)
+
+
+def plot_title(property_name):
+    return f"Hotel Occupancy Forecast - {property_name}"
+
+
+def render_map(lat, lon, property_name):
+    """Folium map HTML with a marker on the property."""
+    with stage("map"):
+        import folium
+
+        folium_map = folium.Map(location=[lat, lon], zoom_start=15)
+        folium.Marker([lat, lon], tooltip=property_name).add_to(folium_map)
+        return folium_map._repr_html_()
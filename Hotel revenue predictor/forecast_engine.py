@@ -0,0 +1,359 @@
+"""Vectorized occupancy forecasters.
+
+Replaces the per-day ``pd.DataFrame`` loop of ``forecast_segment_all_features``.
+Everything that does not depend on the recursion (the imputation vector,
+``base_year``) is computed once, calendar features are sliced from the
+precomputed ``calendar_table``, and the lag / rolling features are read from
+a small ring buffer holding the tail of each series, so the only per-day work
+left is one ``scaler.transform`` and one ``lgb_model.predict`` call.
+
+The arithmetic deliberately mirrors the pandas code it replaces (NaN-skipping
+mean and population std, row-based lags over the merged history, ``fillna``
+with ``X_train`` means) so predictions are identical to the original loop.
+
+``DirectForecaster`` is a faster alternative for long horizons: it builds
+every horizon day's features from what is known at the cutoff and scores
+the whole horizon in a single ``predict`` call (see its docstring).
+
+``start`` exposes the same day loop as a generator, so a caller can stream
+each day as soon as it is predicted.
+
+When the model is LightGBM and the scaler a ``StandardScaler``, scoring
+skips both sklearn wrappers (``native_predictor``): the scaling is applied
+with NumPy and the feature matrix goes to ``Booster.predict`` as a
+contiguous float32 array, with ``PREDICT_THREADS`` threads.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from artifacts import LazyArtifact
+from calendar_table import as_calendar
+
+LAGS = (1, 7, 15)
+ROLLING_WINDOWS = (3, 7, 15)
+PROP_TYPE_DUMMIES = 10
+
+DAY = pd.Timedelta(days=1)
+
+# LightGBM threads per predict call; 0 keeps LightGBM's default (all cores).
+# Lockstep batches are small, so 1 often wins when several workers predict at once.
+PREDICT_THREADS = int(os.getenv("LGB_NUM_THREADS", "0"))
+
+
+def _unwrap(artifact):
+    return artifact.load() if isinstance(artifact, LazyArtifact) else artifact
+
+
+def native_predictor(scaler, lgb_model, feature_columns, num_threads=PREDICT_THREADS):
+    """``predict(X)`` for a float64 feature matrix laid out as ``feature_columns``.
+
+    Uses ``StandardScaler`` arithmetic plus ``lightgbm.Booster.predict`` on
+    float32 when both artifacts allow it, else ``scaler.transform`` and
+    ``lgb_model.predict`` as before.
+    """
+    scaler, model = _unwrap(scaler), _unwrap(lgb_model)
+    booster = getattr(model, 'booster_', model)
+    native_model = type(booster).__name__ == 'Booster' and type(booster).__module__.startswith('lightgbm')
+    native_scaler = type(scaler).__name__ == 'StandardScaler' and hasattr(scaler, 'scale_')
+    if native_model and native_scaler:
+        mean = scaler.mean_ if scaler.with_mean else None
+        scale = scaler.scale_ if scaler.with_std else None
+
+        def predict(X):
+            # The same operations, in the same order, as StandardScaler.transform.
+            if mean is not None:
+                X = X - mean
+            if scale is not None:
+                X = X / scale
+            return booster.predict(np.ascontiguousarray(X, dtype=np.float32), num_threads=num_threads)
+
+        return predict
+
+    wants_frame = getattr(scaler, 'feature_names_in_', None) is not None
+    columns = list(feature_columns)
+
+    def predict(X):
+        if wants_frame:
+            X = pd.DataFrame(X, columns=columns)
+        return model.predict(scaler.transform(X))
+
+    return predict
+
+
+def extended_history(hist_dates, hist_occupied, cutoff_date):
+    """Rebuild the history part of the original ``extended_series``.
+
+    The original merged a daily ``date_range`` with the segment rows, so days
+    without data became NaN rows and days matched by several rows (several
+    distances inside the tolerance) appeared several times. Lags and rolling
+    windows are row-based over that frame, so the same layout is kept here.
+
+    Returns the occupied values of every history row and the first forecast date.
+    """
+    hist_dates = pd.DatetimeIndex(hist_dates)
+    start = hist_dates[0]
+    n_days = (pd.Timestamp(cutoff_date) - start) // DAY + 1
+    day_offset = ((hist_dates - start) // DAY).to_numpy()
+
+    rows_per_day = np.maximum(np.bincount(day_offset, minlength=n_days), 1)
+    day_start = np.cumsum(rows_per_day) - rows_per_day
+    rank = np.arange(len(day_offset)) - np.searchsorted(day_offset, day_offset, side='left')
+
+    values = np.full(int(rows_per_day.sum()), np.nan)
+    values[day_start[day_offset] + rank] = hist_occupied
+    return values, start + n_days * DAY
+
+
+class OccupancyWindow:
+    """The last ``capacity`` occupancy values of several series.
+
+    Each value is written twice, at ``pos`` and ``pos + capacity``, so the
+    window is always one contiguous, chronologically ordered slice and
+    advancing a day is O(1) per series.
+    """
+
+    def __init__(self, histories, capacity):
+        self.capacity = capacity
+        self.counts = np.array([len(h) for h in histories])
+        self._buf = np.full((len(histories), 2 * capacity), np.nan)
+        self._pos = 0
+        for row, history in enumerate(histories):
+            tail = history[-capacity:]
+            self._buf[row, capacity - len(tail):capacity] = tail
+
+    def view(self):
+        return self._buf[:, self._pos:self._pos + self.capacity]
+
+    def push(self, values):
+        self._buf[:, self._pos] = values
+        self._buf[:, self._pos + self.capacity] = values
+        self._pos = (self._pos + 1) % self.capacity
+        self.counts += 1
+
+
+def _nan_mean_std(block):
+    """Row-wise NaN-skipping mean and ddof=0 std, computed like pandas' nanops."""
+    mask = np.isnan(block)
+    count = block.shape[1] - mask.sum(axis=1)
+    filled = np.where(mask, 0.0, block)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = filled.sum(axis=1) / count
+        sqr = (mean[:, None] - filled) ** 2
+        sqr[mask] = 0.0
+        std = np.sqrt(sqr.sum(axis=1) / count)
+    return mean, std
+
+
+class RecursiveForecaster:
+    """Recursive day-by-day forecaster with precomputed static features.
+
+    ``X_train`` is only used for the imputation means and ``base_year``; both
+    are computed once here instead of on every forecast day. ``holiday_dates``
+    is a ``HolidayCalendar`` (kept, so holiday file reloads are picked up) or
+    a plain collection of dates.
+    """
+
+    def __init__(self, scaler, lgb_model, feature_columns, X_train, holiday_dates):
+        self.scaler = scaler
+        self.lgb_model = lgb_model
+        self.feature_columns = list(feature_columns)
+        self.calendar = as_calendar(holiday_dates)
+        # A compacted history (see ``artifacts.compact_history``) carries both.
+        if 'feature_means' in X_train.attrs:
+            self.base_year = int(X_train.attrs['base_year'])
+            means = pd.Series(X_train.attrs['feature_means'], dtype=np.float64)
+        else:
+            self.base_year = int(X_train['date'].dt.year.min())
+            means = X_train.mean(numeric_only=True)
+        self.fill_values = means.reindex(self.feature_columns).to_numpy(dtype=np.float64)
+        self._col = {name: i for i, name in enumerate(self.feature_columns)}
+        # Resolved on the first prediction: the model and scaler may load lazily.
+        self._predict = None
+        self.capacity = max(max(LAGS), max(ROLLING_WINDOWS))
+
+    def _static_rows(self, segments):
+        """Feature rows with the per-segment constants filled in, NaN elsewhere."""
+        rows = np.full((len(segments), len(self.feature_columns)), np.nan)
+        for r, (star_rating, property_type_cat, distance) in enumerate(segments):
+            values = {'starRating': star_rating, 'distanceFromCenter': distance}
+            for j in range(PROP_TYPE_DUMMIES):
+                values[f'prop_type_{j}'] = 1 if property_type_cat == j else 0
+            for name, value in values.items():
+                if name in self._col:
+                    rows[r, self._col[name]] = value
+        return rows
+
+    def _dynamic_features(self, window):
+        """Lag, rolling and daily_change features for the next day of every series."""
+        view = window.view()
+        counts = window.counts
+        features = {}
+        for lag in LAGS:
+            features[f'lag_{lag}'] = np.where(counts >= lag, view[:, self.capacity - lag], np.nan)
+        for size in ROLLING_WINDOWS:
+            mean, std = _nan_mean_std(view[:, self.capacity - size:])
+            for r in np.flatnonzero(counts < size):
+                # Short histories: the original used every row seen so far.
+                short_mean, short_std = _nan_mean_std(view[r:r + 1, self.capacity - counts[r]:])
+                mean[r], std[r] = short_mean[0], short_std[0]
+            features[f'rolling_{size}_mean'] = mean
+            features[f'rolling_{size}_std'] = std
+        # The current day's occupancy is unknown until it is predicted, so the
+        # original loop always saw NaN here and fell back to the training mean.
+        features['daily_change'] = np.full(len(counts), np.nan)
+        return features
+
+    def predict_rows(self, X):
+        """Scale and score a feature matrix laid out as ``feature_columns``."""
+        metrics.count("model_calls")
+        X = np.where(np.isnan(X), self.fill_values, X)
+        if self._predict is None:
+            self._predict = native_predictor(self.scaler, self.lgb_model, self.feature_columns)
+        return self._predict(X)
+
+    def forecast_many(self, histories, segments, cutoff_date, end_date):
+        """Advance several segments in lockstep, one horizon day at a time.
+
+        ``histories`` holds one ``(dates, occupied)`` pair per segment, sorted by
+        date and cut at ``cutoff_date``; ``segments`` holds the matching
+        ``(starRating, propertyType_cat, distanceFromCenter)`` tuples.
+        Returns the horizon dates, a ``(n_segments, n_days)`` prediction matrix
+        and the last history value of each segment.
+        """
+        horizon, last_actual, days = self.start(histories, segments, cutoff_date, end_date)
+        predictions = np.empty((len(segments), len(horizon)))
+        for day, values in enumerate(days):
+            predictions[:, day] = values
+        return horizon, predictions, last_actual
+
+    def _extend(self, histories, cutoff_date, end_date):
+        extended = [extended_history(dates, occupied, cutoff_date) for dates, occupied in histories]
+        horizon = pd.date_range(start=extended[0][1], end=end_date)
+        if any(first != horizon[0] for _, first in extended[1:]):
+            raise ValueError("Segments in one batch must share a forecast horizon")
+        return extended, horizon, np.array([values[-1] for values, _ in extended])
+
+    def start(self, histories, segments, cutoff_date, end_date):
+        """Incremental ``forecast_many``: the horizon dates, the last history
+        values and a generator that predicts one horizon day per step,
+        yielding that day's value for every segment."""
+        extended, horizon, last_actual = self._extend(histories, cutoff_date, end_date)
+        window = OccupancyWindow([values for values, _ in extended], self.capacity)
+        static_rows = self._static_rows(segments)
+        calendar = self.calendar.features(horizon[0], len(horizon), self.base_year)
+        calendar_cols = [(self._col[name], values) for name, values in calendar.items() if name in self._col]
+
+        def days():
+            for day in range(len(horizon)):
+                X = static_rows.copy()
+                for col, values in calendar_cols:
+                    X[:, col] = values[day]
+                for name, values in self._dynamic_features(window).items():
+                    if name in self._col:
+                        X[:, self._col[name]] = values
+                values = self.predict_rows(X)
+                window.push(values)
+                yield values
+
+        return horizon, last_actual, days()
+
+    def forecast(self, hist_dates, hist_occupied, starRating, propertyType_cat, distanceFromCenter, cutoff_date, end_date):
+        """Forecast one segment; returns the same frame as ``forecast_segment_all_features``."""
+        segment = (starRating, propertyType_cat, distanceFromCenter)
+        horizon, predictions, last_actual = self.forecast_many(
+            [(hist_dates, hist_occupied)], [segment], cutoff_date, end_date,
+        )
+        return segment_frame(horizon, predictions[0], last_actual[0], *segment)
+
+
+class DirectForecaster(RecursiveForecaster):
+    """Direct-strategy forecaster: all horizon days in one ``predict`` call.
+
+    The occupancy model was trained on lag and rolling features, so instead
+    of feeding back its own predictions, days after the cutoff are filled
+    with a seasonal-naive extension of the history (the last week repeated).
+    Lags and rolling windows are then read from that extended series, which
+    only uses values known at the cutoff. Cost no longer grows with one
+    model call per day, at the price of ignoring the predicted trajectory;
+    ``benchmarks.bench_horizon`` compares both strategies on held-out history.
+    """
+
+    season = 7
+
+    def forecast_many(self, histories, segments, cutoff_date, end_date):
+        """Same inputs and outputs as ``RecursiveForecaster.forecast_many``."""
+        extended, horizon, last_actual = self._extend(histories, cutoff_date, end_date)
+        return horizon, self._predict_horizon(extended, horizon, segments), last_actual
+
+    def start(self, histories, segments, cutoff_date, end_date):
+        """Same as ``RecursiveForecaster.start``; the single model call runs on the first step."""
+        extended, horizon, last_actual = self._extend(histories, cutoff_date, end_date)
+
+        def days():
+            yield from self._predict_horizon(extended, horizon, segments).T
+
+        return horizon, last_actual, days()
+
+    def _predict_horizon(self, extended, horizon, segments):
+        n_segments, n_days = len(segments), len(horizon)
+
+        # The last ``capacity`` history rows (NaN before the first one), then
+        # the seasonal-naive rows for the horizon.
+        series = np.full((n_segments, self.capacity + n_days), np.nan)
+        for row, (values, _) in enumerate(extended):
+            tail = values[-self.capacity:]
+            series[row, self.capacity - len(tail):self.capacity] = tail
+        last_season = series[:, self.capacity - self.season:self.capacity]
+        series[:, self.capacity:] = np.tile(last_season, -(-n_days // self.season))[:, :n_days]
+
+        X = np.repeat(self._static_rows(segments), n_days, axis=0)
+        for name, values in self.calendar.features(horizon[0], n_days, self.base_year).items():
+            if name in self._col:
+                X[:, self._col[name]] = np.tile(values, n_segments)
+        days = self.capacity + np.arange(n_days)
+        for lag in LAGS:
+            if f'lag_{lag}' in self._col:
+                X[:, self._col[f'lag_{lag}']] = series[:, days - lag].ravel()
+        for size in ROLLING_WINDOWS:
+            windows = np.lib.stride_tricks.sliding_window_view(
+                series[:, self.capacity - size:self.capacity + n_days - 1], size, axis=1,
+            )
+            mean, std = _nan_mean_std(windows.reshape(-1, size))
+            for name, values in ((f'rolling_{size}_mean', mean), (f'rolling_{size}_std', std)):
+                if name in self._col:
+                    X[:, self._col[name]] = values
+        # daily_change stays NaN, as in the recursive forecaster.
+
+        return self.predict_rows(X).reshape(n_segments, n_days)
+
+
+STRATEGIES = {'recursive': RecursiveForecaster, 'direct': DirectForecaster}
+
+
+def segment_frame(horizon, occupied, last_actual, starRating, propertyType_cat, distanceFromCenter):
+    """Lay out one segment's predictions as the frame the original loop returned."""
+    future_df = pd.DataFrame({
+        'date': horizon,
+        'occupied': occupied,
+        'daily_change': np.diff(occupied, prepend=last_actual),
+    })
+    future_df['starRating'] = starRating
+    future_df['distanceFromCenter'] = distanceFromCenter
+    future_df['propertyType_cat'] = propertyType_cat
+    return future_df
+
+
+_cached_forecasters = {}
+
+
+def forecaster_for(scaler, lgb_model, feature_columns, X_train, holiday_dates, strategy='recursive'):
+    """Return a forecaster for these artifacts, reusing it while they are unchanged."""
+    key = (scaler, lgb_model, feature_columns, X_train, holiday_dates)
+    cached = _cached_forecasters.get(strategy)
+    if cached is None or any(a is not b for a, b in zip(cached[0], key)):
+        cached = (key, STRATEGIES[strategy](scaler, lgb_model, feature_columns, X_train, holiday_dates))
+        _cached_forecasters[strategy] = cached
+    return cached[1]
@@ -0,0 +1,148 @@
+"""Executor layer that keeps CPU-bound forecasting off the asyncio event loop.
+
+``thread`` mode suits work that releases the GIL (LightGBM prediction, NumPy);
+``process`` mode runs each job in a worker process that has the model and
+history preloaded by ``initializer``. Either way the number of admitted jobs
+is bounded, so overload turns into fast 503s instead of an ever-growing queue,
+and every job gets a deadline.
+
+Errors cross the process boundary by pickling, so a job should raise
+``JobError`` (a status and a message) rather than a framework exception
+that may not unpickle. A pool broken by a dead worker is dropped and
+rebuilt on the next job instead of failing every job after it.
+"""
+import asyncio
+import concurrent.futures
+import contextlib
+import functools
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+
+class ExecutorSaturated(Exception):
+    """Raised when a job is submitted while ``max_pending`` jobs are admitted."""
+
+
+class JobError(Exception):
+    """A failure a job reports to its caller; plain arguments, so it pickles in process mode."""
+
+    def __init__(self, status_code, detail):
+        super().__init__(status_code, detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class ForecastExecutor:
+    """Bounded thread or process pool with per-job timeouts."""
+
+    def __init__(self, mode="thread", max_workers=None, max_pending=None, timeout_seconds=60.0,
+                 initializer=None, initargs=()):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown executor mode: {mode}")
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 4 * self.max_workers
+        self.timeout_seconds = timeout_seconds
+        self._initializer = initializer
+        self._initargs = initargs
+        self._pool = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.pool_restarts = 0
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                if self.mode == "process":
+                    self._pool = concurrent.futures.ProcessPoolExecutor(
+                        max_workers=self.max_workers, initializer=self._initializer, initargs=self._initargs,
+                    )
+                else:
+                    self._pool = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="forecast",
+                    )
+            return self._pool
+
+    def _drop_pool(self, pool):
+        """Forget ``pool`` if it is still current, so the next job starts a fresh one."""
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+            self.pool_restarts += 1
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    @contextlib.contextmanager
+    def admitted(self):
+        """Hold one admission slot for the block; raises ExecutorSaturated when none is free.
+
+        ``run`` takes one per job. Work stepped in this process with
+        ``run_step`` holds one around all of its steps.
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ExecutorSaturated(f"{self.pending} forecasts already queued")
+        self.pending += 1
+        try:
+            yield
+        finally:
+            self.pending -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        """Run ``fn`` in the pool; raises ExecutorSaturated, asyncio.TimeoutError or,
+        when a worker process died under the job, BrokenProcessPool.
+
+        A timed-out job cannot be interrupted and keeps its worker until it
+        finishes, but its slot is released so new requests are not blocked.
+        """
+        with self.admitted():
+            loop = asyncio.get_running_loop()
+            pool = self._get_pool()
+            try:
+                result = await self._wait(loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs)))
+            except BrokenProcessPool:
+                self._drop_pool(pool)
+                raise
+            self.completed += 1
+            return result
+
+    async def run_step(self, fn, *args):
+        """Run ``fn`` on a thread of this process with the job timeout, inside ``admitted``.
+
+        For work that must stay in this process, such as stepping a
+        generator: thread mode uses the forecast pool, process mode the
+        default thread pool. Takes no slot of its own.
+        """
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool() if self.mode == "thread" else None
+        return await self._wait(loop.run_in_executor(pool, functools.partial(fn, *args)))
+
+    async def _wait(self, future):
+        try:
+            return await asyncio.wait_for(future, self.timeout_seconds)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "timeout_seconds": self.timeout_seconds,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "pool_restarts": self.pool_restarts,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
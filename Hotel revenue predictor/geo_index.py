@@ -0,0 +1,73 @@
+"""Spatial index over property coordinates for nearest-neighbour queries.
+
+Latitude / longitude are mapped to points on the unit sphere and put in a
+``scipy.spatial.cKDTree`` once at load time. Straight-line (chord) distance
+between those points is monotonic in great-circle distance, so k-nearest and
+radius queries on the tree are exact, and each takes microseconds instead
+of a haversine pass over the whole catalog.
+"""
+import numpy as np
+from scipy.spatial import cKDTree
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _unit_vectors(lat, lon):
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+
+def _chord(km):
+    return 2 * np.sin(np.minimum(np.asarray(km, dtype=np.float64), np.pi * EARTH_RADIUS_KM) / (2 * EARTH_RADIUS_KM))
+
+
+def _km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0.0, 1.0))
+
+
+class GeoIndex:
+    """k-nearest / within-radius lookups over ``PropertyRecord`` coordinates.
+
+    Records without valid coordinates are left out.
+    """
+
+    def __init__(self, records):
+        lat = np.array([record.latitude for record in records], dtype=np.float64)
+        lon = np.array([record.longitude for record in records], dtype=np.float64)
+        valid = np.isfinite(lat) & np.isfinite(lon) & (np.abs(lat) <= 90) & (np.abs(lon) <= 180)
+        self.records = [record for record, ok in zip(records, valid) if ok]
+        self._tree = cKDTree(_unit_vectors(lat[valid], lon[valid]) if valid.any() else np.empty((0, 3)))
+
+    def __len__(self):
+        return len(self.records)
+
+    def nearby(self, latitude, longitude, k=10, radius_km=None, exclude_id=None):
+        """``(record, distance_km)`` pairs, nearest first.
+
+        With ``radius_km`` only properties within it are returned; ``k``
+        caps the count (None for every property in the radius).
+        """
+        if not self.records or (k is not None and k <= 0):
+            return []
+        point = _unit_vectors([latitude], [longitude])[0]
+        if k is None:
+            if radius_km is None:
+                raise ValueError("k or radius_km is required")
+            positions = np.asarray(self._tree.query_ball_point(point, _chord(radius_km)), dtype=int)
+            chords = np.linalg.norm(self._tree.data[positions] - point, axis=1)
+            order = np.argsort(chords, kind='stable')
+            positions, chords = positions[order], chords[order]
+        else:
+            wanted = min(k + (exclude_id is not None), len(self.records))
+            bound = np.inf if radius_km is None else _chord(radius_km)
+            chords, positions = self._tree.query(point, k=wanted, distance_upper_bound=bound)
+            chords, positions = np.atleast_1d(chords), np.atleast_1d(positions)
+            found = positions < len(self.records)
+            positions, chords = positions[found], chords[found]
+
+        results = [
+            (self.records[position], float(km))
+            for position, km in zip(positions.tolist(), _km(chords).tolist())
+            if self.records[position].property_id != exclude_id
+        ]
+        return results if k is None else results[:k]
@@ -0,0 +1,327 @@
+"""Append-only ingestion of new occupancy actuals.
+
+New daily ``occupiedRooms`` rows are appended as fixed-size binary records
+(``UPDATE_DTYPE``) to ``Cluster_Demand_model_df.updates`` next to the
+history, instead of regenerating and reloading ``Cluster_Demand_model_df``.
+Every process keeps the byte offset it has read up to: ``refresh`` reads
+only the records past it and appends them to the ``SegmentIndex`` deltas,
+so a daily update costs time proportional to the new rows. Uvicorn
+workers and process-mode forecast workers each pick up rows another
+process ingested on their next refresh.
+
+``on_rows`` is called with the records each refresh applied, so the caller
+can drop cached forecasts of exactly the segments they touch
+(``segment_matcher``); ``reconcile`` does the same for a nightly
+``ForecastStore`` written before the rows arrived.
+
+Rows are append-only: a (segment, day) that already has a row is skipped,
+not overwritten. ``compact`` folds the log into the columnar store once it
+grows; running workers then need a restart to map the new store.
+
+The log starts with a header holding an *epoch* id, and every compaction
+empties the log under a new epoch. Readers and nightly stores remember the
+epoch their row counts belong to, so a compaction is detected by the epoch
+changing, never by comparing sizes or row counts across generations.
+
+    python -m history_store ingest new_rows.csv
+    python -m history_store compact
+"""
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from artifacts import (
+    HISTORY_COLUMNS_DIR, HISTORY_PICKLE, HISTORY_UPDATES, SERVING_DTYPES,
+    load_history, to_day_ordinals, write_history_columns,
+)
+
+# One log record per ingested row, in the serving dtypes.
+UPDATE_DTYPE = np.dtype([(name, dtype) for name, dtype in SERVING_DTYPES.items()])
+
+# Log layout: LOG_MAGIC, the 8-byte epoch, then UPDATE_DTYPE records.
+LOG_MAGIC = b"HSLOG001"
+HEADER_SIZE = len(LOG_MAGIC) + 8
+
+
+def new_epoch():
+    return os.urandom(8).hex()
+
+
+def write_header(log, epoch):
+    log.write(LOG_MAGIC + bytes.fromhex(epoch))
+
+
+def read_header(log):
+    """Epoch of an open log, or None while it has no complete header; ValueError if it is not a log."""
+    log.seek(0)
+    header = log.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE and LOG_MAGIC.startswith(header[:len(LOG_MAGIC)]):
+        return None
+    if not header.startswith(LOG_MAGIC):
+        raise ValueError("no update-log header (written by an older version?)")
+    return header[len(LOG_MAGIC):].hex()
+
+
+def read_records(log, epoch, start=0, count=-1):
+    """Records ``start``.. of an open log, or None if it is no longer at ``epoch``."""
+    log.seek(HEADER_SIZE + start * UPDATE_DTYPE.itemsize)
+    records = np.fromfile(log, dtype=UPDATE_DTYPE, count=count)
+    # A compaction between the header check and the read leaves nothing usable.
+    return records if read_header(log) == epoch else None
+
+
+def update_records(rows):
+    """``UPDATE_DTYPE`` records of a frame with the history's column names."""
+    records = np.empty(len(rows), dtype=UPDATE_DTYPE)
+    records['date'] = to_day_ordinals(pd.to_datetime(rows['date']).to_numpy())
+    for name in ('starRating', 'propertyType_cat', 'distanceFromCenter', 'occupiedRooms'):
+        values = rows[name].to_numpy()
+        records[name] = values
+        if name in ('starRating', 'propertyType_cat') and not np.array_equal(records[name], values):
+            raise ValueError(f"{name} out of range")
+    return records
+
+
+def segment_matcher(records, tolerance=0.1):
+    """``match(star, type, distance, cutoff_day)``: whether a forecast saw any of ``records``.
+
+    A segment's history takes rows within ``tolerance`` of its distance up to
+    the cutoff day, so only those forecasts change.
+    """
+    touched = {}
+    for day, star, ptype, distance, _ in records.tolist():
+        touched.setdefault((star, ptype), []).append((distance, day))
+    touched = {key: np.array(rows).T for key, rows in touched.items()}
+    # Slack so rows on a tolerance bound are never missed; an extra invalidation is harmless.
+    tolerance += 1e-4
+
+    def match(star, ptype, distance, cutoff_day):
+        rows = touched.get((star, ptype))
+        if rows is None:
+            return False
+        return bool(np.any((np.abs(rows[0] - distance) <= tolerance) & (rows[1] <= cutoff_day.toordinal())))
+
+    return match
+
+
+def validate(records):
+    """Reason the records cannot be ingested, or None."""
+    occupied = records['occupiedRooms']
+    if not np.all(np.isfinite(occupied)) or np.any(occupied < 0):
+        return "occupiedRooms must be finite and non-negative"
+    if not np.all(np.isfinite(records['distanceFromCenter'])):
+        return "distanceFromCenter must be finite"
+    return None
+
+
+class HistoryStore:
+    """Append-only update log applied incrementally to a ``SegmentIndex``."""
+
+    def __init__(self, index, path=HISTORY_UPDATES, check_seconds=5.0, on_rows=None, clock=time.monotonic):
+        self.index = index
+        self.path = path
+        self.check_seconds = check_seconds
+        self.on_rows = on_rows
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.epoch = None
+        self.rows = 0
+        self._checked_at = None
+        self.applied = 0
+        self.ingested = 0
+        self.duplicates = 0
+        self.last_day = None
+
+    def _read_new(self):
+        """Records past ``rows``, following the log into a new epoch if it was compacted."""
+        try:
+            log = open(self.path, "rb")
+        except FileNotFoundError:
+            return np.empty(0, dtype=UPDATE_DTYPE)
+        with log:
+            while True:
+                try:
+                    epoch = read_header(log)
+                except ValueError as e:
+                    print(f"Warning: ignoring {self.path}: {e}")
+                    return np.empty(0, dtype=UPDATE_DTYPE)
+                if epoch is None:
+                    return np.empty(0, dtype=UPDATE_DTYPE)
+                if epoch != self.epoch:
+                    if self.epoch is not None:
+                        print(f"Warning: {self.path} was compacted; restart to load the compacted history")
+                    # Everything in a new epoch was appended after the compaction.
+                    self.epoch, self.rows = epoch, 0
+                size = os.fstat(log.fileno()).st_size
+                count = (size - HEADER_SIZE) // UPDATE_DTYPE.itemsize - self.rows
+                if count <= 0:
+                    return np.empty(0, dtype=UPDATE_DTYPE)
+                records = read_records(log, epoch, self.rows, count)
+                if records is not None:
+                    self.rows += len(records)
+                    return records
+
+    def refresh(self):
+        """Apply records appended since the last refresh; returns them."""
+        with self._lock:
+            self._checked_at = self._clock()
+            records = self._read_new()
+            if len(records) == 0:
+                return records
+            self.index.append(
+                records['starRating'], records['propertyType_cat'], records['distanceFromCenter'],
+                records['date'], records['occupiedRooms'],
+            )
+            self.applied += len(records)
+            self.last_day = max(self.last_day or 0, int(records['date'].max()))
+        if self.on_rows is not None:
+            self.on_rows(records)
+        return records
+
+    def maybe_refresh(self):
+        """``refresh`` at most every ``check_seconds``; cheap enough for every request."""
+        checked_at = self._checked_at
+        if checked_at is None or self._clock() - checked_at >= self.check_seconds:
+            self.refresh()
+
+    def ingest(self, records):
+        """Append the records that do not duplicate an existing (segment, day) row.
+
+        Returns ``(appended, duplicates)``. The log is locked while it is
+        checked and written, so concurrent ingests from several workers
+        cannot both add the same row.
+        """
+        with open(self.path, "ab") as log:
+            if fcntl is not None:
+                fcntl.flock(log, fcntl.LOCK_EX)
+            try:
+                if os.fstat(log.fileno()).st_size == 0:
+                    write_header(log, new_epoch())
+                    log.flush()
+                self.refresh()
+                keys = set()
+                keep = np.ones(len(records), dtype=bool)
+                for i, (day, star, ptype, distance, _) in enumerate(records.tolist()):
+                    key = (star, ptype, distance, day)
+                    keep[i] = key not in keys and not self.index.contains(star, ptype, distance, day)
+                    keys.add(key)
+                appended = records[keep]
+                log.write(appended.tobytes())
+                log.flush()
+                os.fsync(log.fileno())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(log, fcntl.LOCK_UN)
+        self.refresh()
+        self.ingested += len(appended)
+        self.duplicates += len(records) - len(appended)
+        return appended, len(records) - len(appended)
+
+    def reconcile(self, store):
+        """Drop the segments of a ``ForecastStore`` that rows ingested after it was written touch.
+
+        A store written against another epoch cannot tell which rows it is
+        missing (they may have been compacted away), so it is dropped whole.
+        """
+        epoch, rows = self.epoch, self.rows
+        if epoch is None:
+            return 0
+        if store.history_log_epoch != epoch:
+            # A store written before the log existed has seen none of its rows.
+            unknown = store.history_log_epoch is not None or store.history_log_rows
+            store.history_log_epoch, store.history_log_rows = epoch, 0
+            if unknown:
+                return store.invalidate(lambda segment: True)
+        done = store.history_log_rows
+        if done >= rows:
+            return 0
+        store.history_log_rows = rows
+        with open(self.path, "rb") as log:
+            records = read_records(log, epoch, done, rows - done)
+        if records is None:
+            return store.invalidate(lambda segment: True)
+        match = segment_matcher(records)
+        return store.invalidate(lambda segment: match(*segment, store.cutoff_day))
+
+    def stats(self):
+        return {
+            "log_epoch": self.epoch,
+            "log_rows": self.rows,
+            "applied_rows": self.applied,
+            "ingested_rows": self.ingested,
+            "duplicate_rows": self.duplicates,
+            "last_date": None if self.last_day is None else pd.Timestamp.fromordinal(self.last_day).strftime("%Y-%m-%d"),
+        }
+
+
+def read_log(path=HISTORY_UPDATES):
+    """Every record in the log at ``path``."""
+    if not os.path.exists(path):
+        return np.empty(0, dtype=UPDATE_DTYPE)
+    with open(path, "rb") as log:
+        epoch = read_header(log)
+        if epoch is None:
+            return np.empty(0, dtype=UPDATE_DTYPE)
+        count = (os.fstat(log.fileno()).st_size - HEADER_SIZE) // UPDATE_DTYPE.itemsize
+        return read_records(log, epoch, 0, count)
+
+
+def compact(columns_dir=HISTORY_COLUMNS_DIR, pickle_path=HISTORY_PICKLE, path=HISTORY_UPDATES):
+    """Merge the log into the columnar store and restart it under a new epoch; returns the rows merged."""
+    with open(path, "ab") as log:
+        if fcntl is not None:
+            fcntl.flock(log, fcntl.LOCK_EX)
+        records = read_log(path)
+        model_df = load_history(columns_dir, pickle_path)
+        merged = pd.concat(
+            [model_df[list(SERVING_DTYPES)], pd.DataFrame(records)], ignore_index=True,
+        ).astype(SERVING_DTYPES)
+        merged.attrs.update(model_df.attrs)
+        merged.attrs.pop('memory_bytes', None)
+        write_history_columns(merged, columns_dir)
+        log.truncate(0)
+        write_header(log, new_epoch())
+        log.flush()
+        os.fsync(log.fileno())
+    return len(records)
+
+
+def main_cli():
+    from segment_index import SegmentIndex
+
+    parser = argparse.ArgumentParser(description="Ingest new occupancy rows or compact the update log")
+    parser.add_argument("command", choices=["ingest", "compact"])
+    parser.add_argument("csv", nargs="?",
+                        help="ingest: CSV with date, starRating, propertyType_cat, distanceFromCenter, occupiedRooms")
+    parser.add_argument("--history", default=HISTORY_COLUMNS_DIR)
+    parser.add_argument("--log", default=HISTORY_UPDATES)
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        print(f"Merged {compact(args.history, path=args.log)} rows into {args.history}")
+        return
+    if args.csv is None:
+        parser.error("ingest needs a CSV file")
+    try:
+        records = update_records(pd.read_csv(args.csv))
+    except ValueError as e:
+        parser.error(str(e))
+    problem = validate(records)
+    if problem:
+        parser.error(problem)
+    store = HistoryStore(SegmentIndex(load_history(args.history)), args.log)
+    appended, duplicates = store.ingest(records)
+    print(f"Appended {len(appended)} rows to {args.log} ({duplicates} duplicates skipped)")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,197 @@
+"""Hot-path instrumentation rendered in the Prometheus text format.
+
+``Histogram`` / ``Registry`` are a minimal in-process implementation of the
+exposition format (no client library needed). Per-request stage timings are
+collected in a ``RequestTimings`` held in a context variable: forecasting
+code wraps its stages in ``with stage("predict"):`` and bumps counters with
+``count("model_calls")``, both no-ops outside an instrumented request.
+
+Forecasts run on ``ForecastExecutor`` workers, so ``run_timed`` is the job
+wrapper: it collects the worker's timings and returns them with the result
+(picklable, so process mode works too) for the event-loop side to merge.
+"""
+import bisect
+import contextlib
+import contextvars
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 30, 60, 120, 365, 1000)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * len(self.buckets), 0, 0.0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._series.items())
+        for labelvalues, (counts, total, value_sum) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts + [total - sum(counts)]):
+                cumulative += count
+                labels = _labels(self.labelnames + ("le",), labelvalues + (_number(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_count{labels} {total}")
+            lines.append(f"{self.name}_sum{labels} {_number(value_sum)}")
+        return lines
+
+
+class Registry:
+    """Histograms plus gauges read from ``stats()``-style callbacks at scrape time."""
+
+    def __init__(self):
+        self.histograms = []
+        self._gauge_sources = []
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        histogram = Histogram(name, help_text, labelnames, buckets)
+        self.histograms.append(histogram)
+        return histogram
+
+    def gauges(self, prefix, stats, help_text=""):
+        """Expose every numeric value of ``stats()`` as gauge ``<prefix>_<key>``."""
+        self._gauge_sources.append((prefix, stats, help_text))
+
+    def render(self):
+        lines = []
+        for histogram in self.histograms:
+            lines.extend(histogram.render())
+        for prefix, stats, help_text in self._gauge_sources:
+            try:
+                values = stats()
+            except Exception as e:
+                print(f"Warning: metrics source {prefix} failed: {e}")
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if not isinstance(value, (int, float)):
+                    continue
+                name = f"{prefix}_{key}"
+                if help_text:
+                    lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def process_stats():
+    """Resident and peak resident memory of this process, in bytes."""
+    peak = 0
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+        peak = peak if sys.platform == "darwin" else peak * 1024
+    rss = peak
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        pass
+    return {"resident_memory_bytes": rss, "peak_resident_memory_bytes": peak}
+
+
+class RequestTimings:
+    """Seconds spent per stage and per-request counters of one request."""
+
+    def __init__(self):
+        self.stages = {}
+        self.counts = {}
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def merge(self, other):
+        for name, seconds in other.stages.items():
+            self.add(name, seconds)
+        for name, n in other.counts.items():
+            self.count(name, n)
+
+    def server_timing(self, total_seconds=None):
+        """``Server-Timing`` header value, durations in milliseconds."""
+        entries = [f"{name};dur={1000 * seconds:.2f}" for name, seconds in self.stages.items()]
+        if total_seconds is not None:
+            entries.append(f"total;dur={1000 * total_seconds:.2f}")
+        return ", ".join(entries)
+
+
+current_timings = contextvars.ContextVar("current_timings", default=None)
+
+
+@contextlib.contextmanager
+def stage(name):
+    """Add the block's wall time to stage ``name`` of the current request, if any."""
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def count(name, n=1):
+    timings = current_timings.get()
+    if timings is not None:
+        timings.count(name, n)
+
+
+def run_timed(fn, *args):
+    """Call ``fn`` with fresh timings active; returns ``(result, timings)``."""
+    timings = RequestTimings()
+    token = current_timings.set(timings)
+    try:
+        return fn(*args), timings
+    finally:
+        current_timings.reset(token)
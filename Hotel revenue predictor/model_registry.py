@@ -0,0 +1,278 @@
+"""Versioned occupancy-model artifacts with hot swapping and shadow evaluation.
+
+A ``ModelVersion`` is one artifact set (model, scaler, feature columns)
+loaded from a directory laid out like the one next to ``main.py``; the
+admin API only names directories under the models root (``version_dir``).
+``ModelRegistry`` serves an *active* version and, optionally, a *candidate*
+that is only evaluated in shadow mode.
+
+Which versions are wanted lives in a small JSON file (``REGISTRY_FILE``), so
+every uvicorn worker and process-mode forecast worker converges on the same
+state: ``maybe_refresh`` re-reads it at most every ``check_seconds``, loads a
+newly named version in a background thread (warming it up with one
+prediction) and only then swaps it in with a single reference assignment.
+Requests take one ``active`` snapshot and use it throughout, so a swap
+never mixes two versions inside a request and never blocks one.
+
+Forecast cache keys and nightly-store manifests carry the version id (the
+name plus a digest of the artifact path and files), so results of a
+replaced version are not served after a swap, even when a name is
+re-registered with other artifacts.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from artifacts import MODEL_NATIVE, MODEL_PICKLE, SCALER_PICKLE, load_model, load_scaler
+from forecast_engine import STRATEGIES
+
+REGISTRY_FILE = "model_registry.json"
+FEATURE_COLUMNS = "feature_columns.pkl"
+ARTIFACT_FILES = (MODEL_NATIVE, MODEL_PICKLE, SCALER_PICKLE, FEATURE_COLUMNS)
+
+
+def version_id(name, path):
+    """``name@digest`` of the artifact directory and its files' sizes and mtimes."""
+    digest = hashlib.sha1(os.path.abspath(path).encode())
+    for filename in ARTIFACT_FILES:
+        try:
+            stat = os.stat(os.path.join(path, filename))
+        except OSError:
+            continue
+        digest.update(f"{filename}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return f"{name}@{digest.hexdigest()[:12]}"
+
+
+def version_dir(root, name):
+    """Artifact directory of version ``name``: a directory directly under ``root``.
+
+    Symlinks are resolved first, so neither ``..`` nor a link can reach
+    artifacts outside ``root``; raises ValueError for such names. Loading
+    unpickles the files found there, so only operator-placed sets qualify.
+    """
+    root = os.path.realpath(root)
+    path = os.path.realpath(os.path.join(root, name))
+    if not name or os.path.basename(name) != name or os.path.dirname(path) != root:
+        raise ValueError(f"Model version {name!r} is not a directory name under the models directory")
+    return path
+
+
+class ModelVersion:
+    """One named artifact set; lightgbm/sklearn load lazily unless ``load`` is called."""
+
+    def __init__(self, name, path="."):
+        import joblib
+
+        self.name = name
+        self.path = path
+        # Taken before loading, so files replaced mid-load give an id that will not match again.
+        self.version_id = version_id(name, path)
+        self.lgb_model = load_model(os.path.join(path, MODEL_NATIVE), os.path.join(path, MODEL_PICKLE))
+        self.scaler = load_scaler(os.path.join(path, SCALER_PICKLE))
+        self.feature_columns = joblib.load(os.path.join(path, FEATURE_COLUMNS))
+        self._forecasters = {}
+
+    @property
+    def spec(self):
+        return {"name": self.name, "path": self.path}
+
+    def load(self):
+        """Load every artifact and score one row, so a broken set fails before it is swapped in."""
+        X = np.zeros((1, len(self.feature_columns)))
+        if getattr(self.scaler, 'feature_names_in_', None) is not None:
+            X = pd.DataFrame(X, columns=self.feature_columns)
+        self.lgb_model.predict(self.scaler.transform(X))
+        return self
+
+    def forecaster(self, X_train, holiday_dates, strategy='recursive'):
+        """This version's forecaster, reused while the history and calendar are unchanged."""
+        cached = self._forecasters.get(strategy)
+        if cached is None or cached[0][0] is not X_train or cached[0][1] is not holiday_dates:
+            cached = ((X_train, holiday_dates), STRATEGIES[strategy](
+                self.scaler, self.lgb_model, self.feature_columns, X_train, holiday_dates,
+            ))
+            self._forecasters[strategy] = cached
+        return cached[1]
+
+
+class ShadowStats:
+    """Running comparison of a candidate against the active version on the same inputs."""
+
+    def __init__(self, candidate=None):
+        self.candidate = candidate
+        self.comparisons = 0
+        self.abs_diff_sum = 0.0
+        self.days = 0
+        self.max_abs_diff = 0.0
+        self.room_nights_delta_sum = 0.0
+        self.active_seconds = 0.0
+        self.candidate_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, active, candidate, active_seconds, candidate_seconds):
+        diff = np.abs(np.asarray(candidate, dtype=np.float64) - np.asarray(active, dtype=np.float64))
+        with self._lock:
+            self.comparisons += 1
+            self.abs_diff_sum += float(diff.sum())
+            self.days += len(diff)
+            self.max_abs_diff = max(self.max_abs_diff, float(diff.max(initial=0.0)))
+            self.room_nights_delta_sum += float(np.sum(candidate) - np.sum(active))
+            self.active_seconds += active_seconds
+            self.candidate_seconds += candidate_seconds
+
+    def stats(self):
+        with self._lock:
+            n = self.comparisons
+            return {
+                "candidate": self.candidate,
+                "comparisons": n,
+                "mean_abs_diff": self.abs_diff_sum / self.days if self.days else 0.0,
+                "max_abs_diff": self.max_abs_diff,
+                "mean_room_nights_delta": self.room_nights_delta_sum / n if n else 0.0,
+                "active_mean_seconds": self.active_seconds / n if n else 0.0,
+                "candidate_mean_seconds": self.candidate_seconds / n if n else 0.0,
+            }
+
+
+class ModelRegistry:
+    """Active + candidate ``ModelVersion`` driven by a shared state file."""
+
+    def __init__(self, initial, path=REGISTRY_FILE, check_seconds=10.0, clock=time.monotonic):
+        self.active = initial
+        self.candidate = None
+        self.shadow_fraction = 0.0
+        self.shadow = ShadowStats()
+        self.path = path
+        self.check_seconds = check_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._checked_at = None
+        self._signature = None
+        self._state = {}
+        self._loading = {}
+        self.errors = {}
+        self.swaps = 0
+        # A restarted worker starts on the version the state file names, not the startup one.
+        self._read_state()
+        spec = self._state.get("active")
+        if spec is not None and (initial is None or initial.spec != spec):
+            try:
+                self.active = ModelVersion(spec["name"], spec["path"])
+            except Exception as e:
+                print(f"Warning: could not load model version {spec['name']}, serving the startup model: {e}")
+
+    def _read_state(self):
+        """Re-read the state file if it changed since the last read."""
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature == self._signature:
+                return
+            self._signature = signature
+            with open(self.path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not read {self.path}: {e}")
+            return
+        self._state = state
+        self.shadow_fraction = float(state.get("shadow_fraction", 0.0))
+
+    def refresh(self):
+        """Apply the state file: swap to, or start loading, the versions it names."""
+        with self._lock:
+            self._checked_at = self._clock()
+            self._read_state()
+            for role in ("active", "candidate"):
+                self._apply(role, self._state.get(role))
+
+    def maybe_refresh(self):
+        """``refresh`` at most every ``check_seconds``; cheap enough for every request."""
+        checked_at = self._checked_at
+        if checked_at is None or self._clock() - checked_at >= self.check_seconds:
+            self.refresh()
+
+    def _apply(self, role, spec):
+        current = getattr(self, role)
+        if spec is None:
+            if role == "candidate" and current is not None:
+                self._swap(role, None)
+            return
+        if current is not None and current.spec == spec:
+            return
+        # Promoting the candidate (or demoting the active version) needs no reload.
+        for version in (self.active, self.candidate):
+            if version is not None and version.spec == spec:
+                self._swap(role, version)
+                return
+        key = (spec["name"], spec["path"])
+        if key not in self._loading and self.errors.get(spec["name"]) is None:
+            thread = threading.Thread(target=self._load, args=(spec,), name=f"model-load-{spec['name']}", daemon=True)
+            self._loading[key] = thread
+            thread.start()
+
+    def _load(self, spec):
+        key = (spec["name"], spec["path"])
+        try:
+            version = ModelVersion(spec["name"], spec["path"]).load()
+        except Exception as e:
+            print(f"Warning: could not load model version {spec['name']} from {spec['path']}: {e}")
+            with self._lock:
+                self.errors[spec["name"]] = str(e)
+                self._loading.pop(key, None)
+            return
+        with self._lock:
+            self._loading.pop(key, None)
+            # The state may have moved on while this version loaded.
+            for role in ("active", "candidate"):
+                if self._state.get(role) == spec:
+                    self._swap(role, version)
+
+    def _swap(self, role, version):
+        setattr(self, role, version)
+        self.swaps += 1
+        if role == "candidate":
+            self.shadow = ShadowStats(None if version is None else version.name)
+
+    def update(self, **changes):
+        """Write ``changes`` (active / candidate specs, shadow_fraction) to the state file and apply them."""
+        with self._lock:
+            state = {
+                "active": None if self.active is None else self.active.spec,
+                "candidate": None if self.candidate is None else self.candidate.spec,
+                "shadow_fraction": self.shadow_fraction,
+                **self._state,
+                **changes,
+            }
+            for spec in (changes.get("active"), changes.get("candidate")):
+                if spec is not None:
+                    # A new request for a version retries it after a failed load.
+                    self.errors.pop(spec["name"], None)
+            tmp_path = f"{self.path}.tmp-{os.getpid()}"
+            with open(tmp_path, "w") as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp_path, self.path)
+        self.refresh()
+
+    def wait(self, timeout=None):
+        """Block until background loads finish (for the CLI and warm-up scripts)."""
+        for thread in list(self._loading.values()):
+            thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "active": None if self.active is None else self.active.name,
+                "active_id": None if self.active is None else self.active.version_id,
+                "candidate": None if self.candidate is None else self.candidate.name,
+                "shadow_fraction": self.shadow_fraction,
+                "loading": [name for name, _ in self._loading],
+                "errors": dict(self.errors),
+                "swaps": self.swaps,
+            }
@@ -0,0 +1,242 @@
+"""Nightly precomputation of every segment's forecast.
+
+Run once per cutoff day (e.g. from cron shortly after midnight):
+
+    python -m precompute run --workers 4
+
+Every distinct (starRating, propertyType_cat, distanceFromCenter) segment
+reachable from the properties CSV is forecast for the next
+``HORIZON_DAYS`` days, in parallel across processes, and written to
+``forecast_store/<cutoff day>/`` as ``.npy`` columns plus a manifest.
+``main`` memory-maps the store for the current day and only computes
+forecasts live for segments it does not contain.
+
+Forecasts only depend on the cutoff *day* (history is cut at the date and
+the horizon starts the day after), so the stored curves are the same ones a
+request during that day would compute.
+"""
+import argparse
+import concurrent.futures
+import datetime
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from forecast_engine import segment_frame
+
+STORE_DIR = "forecast_store"
+HORIZON_DAYS = 30
+
+
+def store_path(day, root=STORE_DIR):
+    return os.path.join(root, pd.Timestamp(day).strftime("%Y-%m-%d"))
+
+
+class ForecastStore:
+    """Memory-mapped forecasts of one cutoff day, looked up by segment."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        columns = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+            for name in ("star_rating", "property_type_cat", "distance", "occupied", "last_actual")
+        }
+        self.cutoff_day = datetime.date.fromisoformat(self.manifest["cutoff_date"])
+        self.horizon = pd.date_range(self.manifest["first_date"], periods=self.manifest["horizon_days"])
+        self.occupied = columns["occupied"]
+        self.last_actual = columns["last_actual"]
+        # Update-log rows these forecasts include; see history_store.HistoryStore.reconcile.
+        self.history_log_rows = self.manifest.get("history_log_rows", 0)
+        self.history_log_epoch = self.manifest.get("history_log_epoch")
+        # Id of the model version that produced the forecasts; see model_registry.version_id.
+        self.model_version = self.manifest.get("model_version")
+        # HolidayCalendar.version of the holidays the forecasts used.
+        self.holidays_version = self.manifest.get("holidays_version")
+        self._rows = {
+            segment: row
+            for row, segment in enumerate(zip(
+                columns["star_rating"].tolist(),
+                columns["property_type_cat"].tolist(),
+                columns["distance"].tolist(),
+            ))
+        }
+
+    def __len__(self):
+        return len(self._rows)
+
+    def invalidate(self, match):
+        """Forget the segments ``match(segment)`` accepts, so they are forecast live; returns the count."""
+        rows = {segment: row for segment, row in self._rows.items() if not match(segment)}
+        dropped = len(self._rows) - len(rows)
+        self._rows = rows
+        return dropped
+
+    def covers(self, cutoff_date, end_date):
+        """Whether the store holds forecasts for this cutoff day and horizon end."""
+        return (
+            pd.Timestamp(cutoff_date).date() == self.cutoff_day
+            and pd.Timestamp(end_date).normalize() == self.horizon[-1]
+        )
+
+    def frame(self, star_rating, property_type_cat, distance):
+        """The segment's forecast as ``segment_frame`` lays it out; None if not stored."""
+        row = self._rows.get((star_rating, property_type_cat, distance))
+        if row is None:
+            return None
+        return segment_frame(
+            self.horizon, np.array(self.occupied[row]), float(self.last_actual[row]),
+            star_rating, property_type_cat, distance,
+        )
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def store_for(cutoff_date, root=STORE_DIR):
+    """The store written for ``cutoff_date``'s day, or None if the job has not run yet.
+
+    Only the most recently opened day is kept mapped.
+    """
+    path = store_path(cutoff_date, root)
+    store = _stores.get(path)
+    if store is None:
+        if not os.path.exists(os.path.join(path, "manifest.json")):
+            return None
+        with _stores_lock:
+            store = _stores.get(path)
+            if store is None:
+                store = ForecastStore(path)
+                _stores.clear()
+                _stores[path] = store
+    return store
+
+
+def enumerate_segments(registry):
+    """Distinct segments of the registry's properties, in a stable order."""
+    return sorted({record.segment for record in registry.records})
+
+
+def forecast_chunk(segments, cutoff_date, end_date):
+    """Forecast one chunk of segments in lockstep (runs in a worker process).
+
+    Returns the horizon's first date, the segments that have history, their
+    predictions and last history values.
+    """
+    import main
+    from segment_index import index_for
+
+    index = index_for(main.model_df)
+    forecaster = main.current_model().forecaster(main.model_df, main.holiday_dates)
+    found, histories = [], []
+    for segment in segments:
+        hist_dates, hist_occupied = index.history(*segment, cutoff_date)
+        if len(hist_dates):
+            found.append(segment)
+            histories.append((hist_dates, hist_occupied))
+    if not found:
+        return None, [], np.empty((0, 0)), np.empty(0)
+    horizon, predictions, last_actual = forecaster.forecast_many(histories, found, cutoff_date, end_date)
+    return horizon[0], found, predictions, last_actual
+
+
+def _preload():
+    import main
+
+    main.preload_worker()
+
+
+def write_store(path, cutoff_date, first_date, segments, predictions, last_actual, extra):
+    """Write the store to a temporary directory and move it into place."""
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    columns = {
+        "star_rating": np.array([s[0] for s in segments], dtype=np.int64),
+        "property_type_cat": np.array([s[1] for s in segments], dtype=np.int64),
+        "distance": np.array([s[2] for s in segments], dtype=np.float64),
+        "occupied": np.ascontiguousarray(predictions, dtype=np.float64),
+        "last_actual": np.asarray(last_actual, dtype=np.float64),
+    }
+    for name, values in columns.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), values)
+    with open(os.path.join(tmp_path, "manifest.json"), "w") as f:
+        json.dump({
+            "cutoff_date": pd.Timestamp(cutoff_date).strftime("%Y-%m-%d"),
+            "first_date": pd.Timestamp(first_date).strftime("%Y-%m-%d"),
+            "horizon_days": int(predictions.shape[1]),
+            "segments": len(segments),
+            **extra,
+        }, f, indent=2)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def run(cutoff_day=None, workers=None, chunk=128, root=STORE_DIR, out=sys.stderr):
+    """Forecast every segment for ``cutoff_day`` (default today) and write the store."""
+    import main
+
+    cutoff_date = pd.Timestamp(cutoff_day or datetime.date.today()).normalize()
+    end_date = cutoff_date + pd.Timedelta(days=HORIZON_DAYS)
+    segments = enumerate_segments(main.property_registry)
+    chunks = [segments[i:i + chunk] for i in range(0, len(segments), chunk)]
+    workers = workers or os.cpu_count() or 1
+    print(f"Forecasting {len(segments)} segments for {cutoff_date:%Y-%m-%d} "
+          f"in {len(chunks)} chunks on {workers} workers", file=out)
+
+    start = time.perf_counter()
+    first_date, done, results = None, 0, []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_preload) as pool:
+        futures = {pool.submit(forecast_chunk, c, cutoff_date, end_date): len(c) for c in chunks}
+        for future in concurrent.futures.as_completed(futures):
+            chunk_first, found, predictions, last_actual = future.result()
+            if found:
+                first_date = chunk_first
+                results.append((found, predictions, last_actual))
+            done += futures[future]
+            elapsed = time.perf_counter() - start
+            print(f"  {done}/{len(segments)} segments  {done / elapsed:.1f} segments/s", file=out)
+
+    elapsed = time.perf_counter() - start
+    if not results:
+        raise RuntimeError("No segment has history up to the cutoff date")
+    found = [segment for result in results for segment in result[0]]
+    path = write_store(
+        store_path(cutoff_date, root), cutoff_date, first_date, found,
+        np.concatenate([result[1] for result in results]),
+        np.concatenate([result[2] for result in results]),
+        {"elapsed_seconds": round(elapsed, 3), "workers": workers,
+         # Ingested rows already in these forecasts; later ones invalidate their segments.
+         "history_log_rows": main.history_store.rows if main.history_store else 0,
+         "history_log_epoch": main.history_store.epoch if main.history_store else None,
+         "model_version": main.current_model().version_id,
+         "holidays_version": main.holiday_dates.version},
+    )
+    print(f"Wrote {len(found)} segments ({len(segments) - len(found)} without history) to {path} "
+          f"in {elapsed:.1f}s ({len(segments) / elapsed:.1f} segments/s)", file=out)
+    return path
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Precompute forecasts for every segment")
+    parser.add_argument("command", choices=["run"])
+    parser.add_argument("--date", type=datetime.date.fromisoformat, default=None,
+                        help="Cutoff day (YYYY-MM-DD); defaults to today")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk", type=int, default=128, help="Segments per lockstep pass")
+    parser.add_argument("--store", default=STORE_DIR)
+    args = parser.parse_args()
+    run(args.date, args.workers, args.chunk, args.store)
+
+
+if __name__ == "__main__":
+    main_cli()
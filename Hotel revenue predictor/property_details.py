@@ -0,0 +1,78 @@
+"""Pre-serialized ``/properties/details`` payload.
+
+The property list only changes when the CSV is reloaded, so it is converted
+and serialized with orjson once per load instead of once per request. Each
+payload variant (page and field projection) carries a content-hash ETag so
+clients can revalidate with ``If-None-Match`` and get a bodiless 304.
+"""
+import hashlib
+
+import orjson
+
+from forecast_cache import ForecastCache
+
+# Response field -> (CSV column, converter), in PropertyInfo order.
+FIELDS = {
+    "name": ("Property Name", str),
+    "id": ("Property ID", str),
+    "star_rating": ("Star Rating", float),
+    "property_type": ("Property Type", str),
+    "distance_from_center": ("Distance from Center", float),
+    "latitude": ("Latitude", float),
+    "longitude": ("Longitude", float),
+}
+
+
+def etag_for(body):
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header value matches ``etag`` (weak comparison)."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+class PropertyDetails:
+    """Serialized property list with cached page/projection variants."""
+
+    def __init__(self, properties_df, max_variants=64):
+        if properties_df.empty:
+            self.columns = {field: [] for field in FIELDS}
+        else:
+            self.columns = {
+                field: properties_df[column].astype(convert).tolist()
+                for field, (column, convert) in FIELDS.items()
+            }
+        self.total = len(self.columns["name"])
+        self.body = orjson.dumps(self._records(0, self.total, tuple(FIELDS)))
+        self.etag = etag_for(self.body)
+        # Never expires: a reload builds a new PropertyDetails.
+        self._variants = ForecastCache(maxsize=max_variants, ttl_seconds=float("inf"))
+
+    def _records(self, start, stop, fields):
+        columns = [self.columns[field][start:stop] for field in fields]
+        return [dict(zip(fields, values)) for values in zip(*columns)]
+
+    def payload(self, offset=0, limit=None, fields=None):
+        """Return ``(body, etag)`` for a page of the list, optionally limited to ``fields``.
+
+        Raises ValueError for unknown field names.
+        """
+        fields = tuple(FIELDS) if fields is None else tuple(fields)
+        unknown = [field for field in fields if field not in FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        stop = self.total if limit is None else min(offset + limit, self.total)
+        start = min(offset, stop)
+        if start == 0 and stop == self.total and fields == tuple(FIELDS):
+            return self.body, self.etag
+        key = (start, stop, fields)
+        cached = self._variants.get(key)
+        if cached is None:
+            body = orjson.dumps(self._records(start, stop, fields))
+            cached = (body, etag_for(body))
+            self._variants.put(key, cached)
+        return cached
@@ -0,0 +1,130 @@
+"""Property lookup by name or Property ID, plus search for the dropdown.
+
+Built once from the properties CSV. Lookups are dict hits instead of a
+string conversion and comparison over the whole column per request, and
+each record already carries the segment values the forecaster needs.
+Names are not unique in the CSV: a name resolves to its first row, as
+before, and ``matches`` reports how many rows share it so callers can ask
+for the Property ID instead.
+"""
+import bisect
+import difflib
+import re
+from typing import NamedTuple
+
+_TOKEN = re.compile(r"\w+")
+# Longest query ``search`` scores; the endpoint rejects longer ones.
+MAX_QUERY_LENGTH = 100
+
+
+def _trigrams(text):
+    """Trigrams of ``text`` padded with spaces, so one- and two-letter keys have some too."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PropertyRecord(NamedTuple):
+    property_id: str
+    name: str
+    star_rating: int
+    property_type: str
+    property_type_cat: int
+    distance_from_center: float
+    latitude: float
+    longitude: float
+
+    @property
+    def segment(self):
+        """(starRating, propertyType_cat, distanceFromCenter) key used by the forecaster."""
+        return (self.star_rating, self.property_type_cat, self.distance_from_center)
+
+
+class PropertyRegistry:
+    def __init__(self, properties_df, property_type_mapping):
+        self.records = []
+        if not properties_df.empty:
+            columns = zip(
+                properties_df['Property ID'].astype(str).tolist(),
+                properties_df['Property Name'].astype(str).tolist(),
+                properties_df['Star Rating'].astype(int).tolist(),
+                properties_df['Property Type'].tolist(),
+                properties_df['Distance from Center'].astype(float).tolist(),
+                properties_df['Latitude'].astype(float).tolist(),
+                properties_df['Longitude'].astype(float).tolist(),
+            )
+            self.records = [
+                PropertyRecord(pid, name, star, ptype, property_type_mapping.get(ptype, -1), dist, lat, lon)
+                for pid, name, star, ptype, dist, lat, lon in columns
+            ]
+
+        self._by_id = {}
+        self._by_name = {}
+        self._name_counts = {}
+        for record in self.records:
+            self._by_id.setdefault(record.property_id, record)
+            self._by_name.setdefault(record.name, record)
+            self._name_counts[record.name] = self._name_counts.get(record.name, 0) + 1
+
+        # Sorted (key, position) pairs for prefix search on the whole name and
+        # on each word of it, so "varuna" finds "Hotel Varuna".
+        keys = set()
+        for position, record in enumerate(self.records):
+            lowered = record.name.lower()
+            keys.add((lowered, position))
+            keys.update((token, position) for token in _TOKEN.findall(lowered))
+        self._prefix_keys = sorted(keys)
+        # Same keys grouped for fuzzy matching, so a typo in one word still hits.
+        self._fuzzy_keys = {}
+        for key, position in self._prefix_keys:
+            self._fuzzy_keys.setdefault(key, []).append(position)
+        # Trigram -> keys containing it. difflib only scores keys sharing a
+        # trigram with the query instead of all ~2.4k keys per call.
+        self._trigram_keys = {}
+        for key in self._fuzzy_keys:
+            for trigram in _trigrams(key):
+                self._trigram_keys.setdefault(trigram, []).append(key)
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, name=None, property_id=None):
+        """Record for ``property_id`` if given, else for ``name``; None if unknown."""
+        if property_id is not None:
+            return self._by_id.get(str(property_id))
+        return self._by_name.get(name)
+
+    def matches(self, name):
+        """Number of properties named ``name``."""
+        return self._name_counts.get(name, 0)
+
+    @property
+    def duplicate_names(self):
+        return sum(1 for count in self._name_counts.values() if count > 1)
+
+    def search(self, query, limit=10):
+        """Properties whose name or a word of it starts with ``query``, then close fuzzy matches."""
+        query = query.strip().lower()[:MAX_QUERY_LENGTH]
+        if not query or limit <= 0:
+            return []
+        found = {}
+        index = bisect.bisect_left(self._prefix_keys, (query, -1))
+        while index < len(self._prefix_keys) and len(found) < limit:
+            key, position = self._prefix_keys[index]
+            if not key.startswith(query):
+                break
+            found.setdefault(position, None)
+            index += 1
+        if len(found) < limit:
+            for key in difflib.get_close_matches(query, self._fuzzy_candidates(query), n=limit, cutoff=0.6):
+                for position in self._fuzzy_keys[key]:
+                    found.setdefault(position, None)
+        # Prefix hits ordered by the name or word they matched, then catalog
+        # position; fuzzy hits after them, closest match first.
+        return [self.records[position] for position in list(found)[:limit]]
+
+    def _fuzzy_candidates(self, query):
+        """Keys sharing at least one trigram with ``query``, in index order."""
+        candidates = set()
+        for trigram in _trigrams(query):
+            candidates.update(self._trigram_keys.get(trigram, ()))
+        return [key for key in self._fuzzy_keys if key in candidates]
@@ -0,0 +1,133 @@
+"""Forecast plot rendering off pyplot's global state.
+
+Plots are drawn with matplotlib's object-oriented ``Figure`` API on an Agg
+canvas, so renders share no state and can run concurrently. ``Renderer``
+runs them in a bounded process pool (matplotlib drawing holds the GIL) and
+keeps the encoded bytes in a ``ForecastCache``: a plot only depends on the
+segment's curves, the cutoff day and the property name in its title, so
+repeated requests skip rendering altogether.
+
+Only plain arrays cross the process boundary; workers import matplotlib on
+their first render. A pool broken by a dead worker, or holding one stuck
+past the timeout, is shut down and rebuilt on the next render.
+"""
+import concurrent.futures
+import io
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from forecast_cache import ForecastCache
+
+# Format -> media type; webp needs Pillow, svg ignores the DPI.
+FORMATS = {"png": "image/png", "webp": "image/webp", "svg": "image/svg+xml"}
+DEFAULT_DPI = 150
+
+
+def draw_forecast(series, title, fmt="png", dpi=DEFAULT_DPI, figsize=(12, 6)):
+    """Encoded plot of ``series``: ``(label, dates, occupied)`` per curve."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    for label, dates, occupied in series:
+        ax.plot(dates, occupied, label=label, marker='o', linewidth=2)
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Occupancy")
+    ax.set_title(title)
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+    fig.tight_layout()
+
+    buf = io.BytesIO()
+    options = {"pil_kwargs": {"quality": 80, "method": 6}} if fmt == "webp" else {}
+    fig.savefig(buf, format=fmt, dpi=dpi, bbox_inches='tight', **options)
+    return buf.getvalue()
+
+
+def plot_series(combined_df):
+    """Picklable ``(label, dates, occupied)`` curves of a frame with a ``source`` column."""
+    return [
+        (label, df['date'].to_numpy(dtype='datetime64[ns]'), np.asarray(df['occupied'], dtype=np.float64))
+        for label, df in combined_df.groupby('source')
+    ]
+
+
+class Renderer:
+    """Bounded render pool plus a cache of encoded plots.
+
+    With ``max_workers=0`` plots are drawn in the calling thread, which is
+    safe with the Figure API but competes with forecasting for the GIL.
+    """
+
+    def __init__(self, max_workers=None, timeout_seconds=30.0, cache_size=256, cache_ttl_seconds=3600.0):
+        self.max_workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+        self.timeout_seconds = timeout_seconds
+        self.cache = ForecastCache(maxsize=cache_size, ttl_seconds=cache_ttl_seconds)
+        self._pool = None
+        self._lock = threading.Lock()
+        self.rendered = 0
+        self.timed_out = 0
+        self.pool_restarts = 0
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._pool
+
+    def _drop_pool(self, pool):
+        """Forget ``pool`` if it is still current, so the next render starts a fresh one."""
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+            self.pool_restarts += 1
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def render(self, key, combined_df, title, fmt="png", dpi=DEFAULT_DPI):
+        """Encoded plot bytes, from the cache when ``key`` + format + DPI was rendered before.
+
+        ``key`` must identify the curves and title and, like forecast cache
+        keys, end with the cutoff day so entries can be dropped per cutoff.
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown image format: {fmt}")
+        cache_key = (fmt, dpi, *key)
+        image = self.cache.get(cache_key)
+        if image is not None:
+            return image
+        args = (plot_series(combined_df), title, fmt, dpi)
+        if self.max_workers:
+            pool = self._get_pool()
+            try:
+                image = pool.submit(draw_forecast, *args).result(self.timeout_seconds)
+            except concurrent.futures.TimeoutError:
+                # The stuck worker would keep its slot; later renders get a new pool.
+                self.timed_out += 1
+                self._drop_pool(pool)
+                raise
+            except BrokenProcessPool:
+                self._drop_pool(pool)
+                raise
+        else:
+            image = draw_forecast(*args)
+        self.rendered += 1
+        self.cache.put(cache_key, image)
+        return image
+
+    def stats(self):
+        return {"workers": self.max_workers, "rendered": self.rendered,
+                "timed_out": self.timed_out, "pool_restarts": self.pool_restarts,
+                **{f"cache_{k}": v for k, v in self.cache.stats().items()}}
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
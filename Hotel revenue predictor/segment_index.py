@@ -0,0 +1,190 @@
+"""Startup-time index over ``Cluster_Demand_model_df``.
+
+Rows are sorted once by (starRating, propertyType_cat, distanceFromCenter,
+date), and every (starRating, propertyType_cat) pair maps to one contiguous
+block. A distance tolerance lookup is then two bisects plus a slice, and a
+date range inside a single distance is two more, so per-request cost grows
+with the size of the segment instead of the size of the history table.
+
+Dates are kept as int32 day ordinals and distances in the history's own
+dtype (float64); only the rows a lookup returns are converted to
+``datetime64``. Query distances are cast to that dtype first, so
+exact-distance lookups match the values of the properties CSV.
+
+Memory: a table that is not already in index order gets sorted copies of
+its distance, day and occupancy columns plus an int64 ``positions`` array,
+24 bytes a row with float32 occupancy. That is about one more copy of the
+history (18 bytes a row in the serving dtypes). A table already in index
+order, like the memory-mapped columnar store, is indexed through views
+and adds only the block map.
+
+Rows ingested after load (see ``history_store``) are kept per
+(starRating, propertyType_cat) block in small append-order delta arrays
+instead of being merged into the sorted columns, so appending costs time
+proportional to the new rows; lookups treat them as rows appended to the
+end of the table.
+"""
+import numpy as np
+import pandas as pd
+
+from artifacts import from_day_ordinals, to_day_ordinals
+
+# Slack for the distance bisect; the exact ``abs(d - x) <= tolerance`` test the
+# masks used is re-applied to the candidates, so this only has to be generous
+# (and larger than any rounding of the bounds).
+_BISECT_SLACK = 1e-4
+
+
+def _first_day(value):
+    """Ordinal of the first whole day at or after ``value``."""
+    value = pd.Timestamp(value)
+    return value.toordinal() + (value != value.normalize())
+
+
+def _last_day(value):
+    """Ordinal of the day ``value`` falls on (history rows are at midnight)."""
+    return pd.Timestamp(value).toordinal()
+
+
+def _day_ordinals(column):
+    values = column.to_numpy()
+    if np.issubdtype(values.dtype, np.integer):
+        return values
+    return to_day_ordinals(values)
+
+
+class SegmentIndex:
+    """Sorted, block-addressable view of the occupancy history."""
+
+    def __init__(self, model_df):
+        days = _day_ordinals(model_df['date'])
+        order = np.lexsort((
+            days,
+            model_df['distanceFromCenter'].to_numpy(),
+            model_df['propertyType_cat'].to_numpy(),
+            model_df['starRating'].to_numpy(),
+        ))
+        if np.array_equal(order, np.arange(len(order))):
+            # Already in index order (e.g. the memory-mapped columnar store):
+            # keep views of the columns instead of private sorted copies.
+            order = slice(None)
+            self.positions = None
+        else:
+            self.positions = order
+        self.distance = model_df['distanceFromCenter'].to_numpy()[order]
+        self.days = days[order]
+        self.occupied = model_df['occupiedRooms'].to_numpy()[order]
+
+        stars = model_df['starRating'].to_numpy()[order]
+        types = model_df['propertyType_cat'].to_numpy()[order]
+        boundaries = np.flatnonzero((stars[1:] != stars[:-1]) | (types[1:] != types[:-1])) + 1
+        starts = np.concatenate(([0], boundaries)).astype(int)
+        stops = np.concatenate((boundaries, [len(stars)])).astype(int)
+        self.blocks = {
+            (stars[start].item(), types[start].item()): (start, stop)
+            for start, stop in zip(starts, stops)
+            if stop > start
+        }
+        # (starRating, propertyType_cat) -> (distance, days, occupied) of appended rows.
+        self.deltas = {}
+
+    def __len__(self):
+        return len(self.days) + sum(len(delta[1]) for delta in self.deltas.values())
+
+    def append(self, stars, types, distances, days, occupied):
+        """Add rows after the end of the table; cost grows with the new rows only."""
+        stars, types = np.asarray(stars), np.asarray(types)
+        distances = np.asarray(distances, dtype=self.distance.dtype)
+        days = np.asarray(days, dtype=self.days.dtype)
+        occupied = np.asarray(occupied, dtype=self.occupied.dtype)
+        for key in dict.fromkeys(zip(stars.tolist(), types.tolist())):
+            rows = (stars == key[0]) & (types == key[1])
+            new = (distances[rows], days[rows], occupied[rows])
+            old = self.deltas.get(key)
+            # Swapped in as one tuple so concurrent lookups see old or new rows, never a mix.
+            self.deltas[key] = new if old is None else tuple(np.concatenate(pair) for pair in zip(old, new))
+
+    def contains(self, starRating, propertyType_cat, distanceFromCenter, day):
+        """Whether a row exists for this exact distance on day ordinal ``day``."""
+        lo, hi = self._distance_range((starRating, propertyType_cat), distanceFromCenter, distanceFromCenter)
+        days = self.days[lo:hi]
+        index = np.searchsorted(days, day)
+        if index < len(days) and days[index] == day:
+            return True
+        delta = self.deltas.get((starRating, propertyType_cat))
+        if delta is None:
+            return False
+        distance = self.distance.dtype.type(distanceFromCenter)
+        return bool(np.any((delta[0] == distance) & (delta[1] == day)))
+
+    def _distance_range(self, key, lo, hi):
+        block = self.blocks.get(key)
+        if block is None:
+            return 0, 0
+        start, stop = block
+        distances = self.distance[start:stop]
+        lo, hi = self.distance.dtype.type(lo), self.distance.dtype.type(hi)
+        return (
+            start + np.searchsorted(distances, lo, side='left'),
+            start + np.searchsorted(distances, hi, side='right'),
+        )
+
+    def history(self, starRating, propertyType_cat, distanceFromCenter, cutoff_date, tolerance=0.1):
+        """Date-sorted ``(dates, occupied)`` of every row within ``tolerance`` up to ``cutoff_date``.
+
+        Same rows, in the same order, as the boolean mask followed by
+        ``sort_values('date')`` that ``forecast_segment_all_features`` used.
+        """
+        lo, hi = self._distance_range(
+            (starRating, propertyType_cat),
+            distanceFromCenter - tolerance - _BISECT_SLACK,
+            distanceFromCenter + tolerance + _BISECT_SLACK,
+        )
+        rows = np.arange(lo, hi)
+        distance = self.distance.dtype.type(distanceFromCenter)
+        rows = rows[np.abs(self.distance[rows] - distance) <= tolerance]
+        rows = rows[self.days[rows] <= _last_day(cutoff_date)]
+        # Restore table order before the date sort so rows sharing a date
+        # (several distances in the tolerance) tie-break exactly as before.
+        if self.positions is not None:
+            rows = rows[np.argsort(self.positions[rows])]
+        days, occupied = self.days[rows], self.occupied[rows]
+        delta = self.deltas.get((starRating, propertyType_cat))
+        if delta is not None:
+            keep = (np.abs(delta[0] - distance) <= tolerance) & (delta[1] <= _last_day(cutoff_date))
+            days = np.concatenate((days, delta[1][keep]))
+            occupied = np.concatenate((occupied, delta[2][keep]))
+        # Sorted as datetime64, like sort_values: NumPy's quicksort breaks date
+        # ties differently for integer keys.
+        dates = from_day_ordinals(days)
+        order = np.argsort(dates, kind='quicksort')
+        return dates[order], occupied[order].astype(np.float64)
+
+    def actuals(self, starRating, propertyType_cat, distanceFromCenter, start_date, end_date):
+        """Date-sorted ``(dates, occupied)`` for one exact distance between two dates, inclusive."""
+        lo, hi = self._distance_range((starRating, propertyType_cat), distanceFromCenter, distanceFromCenter)
+        days = self.days[lo:hi]
+        first = lo + np.searchsorted(days, _first_day(start_date), side='left')
+        last = lo + np.searchsorted(days, _last_day(end_date), side='right')
+        days, occupied = self.days[first:last], self.occupied[first:last]
+        delta = self.deltas.get((starRating, propertyType_cat))
+        if delta is not None:
+            distance = self.distance.dtype.type(distanceFromCenter)
+            keep = (delta[0] == distance) & (delta[1] >= _first_day(start_date)) & (delta[1] <= _last_day(end_date))
+            if keep.any():
+                days = np.concatenate((days, delta[1][keep]))
+                occupied = np.concatenate((occupied, delta[2][keep]))
+                order = np.argsort(days, kind='stable')
+                days, occupied = days[order], occupied[order]
+        return from_day_ordinals(days), occupied.astype(np.float64)
+
+
+_cached_index = None
+
+
+def index_for(model_df):
+    """Return the index of ``model_df``, building it only when the frame changes."""
+    global _cached_index
+    if _cached_index is None or _cached_index[0] is not model_df:
+        _cached_index = (model_df, SegmentIndex(model_df))
+    return _cached_index[1]
@@ -0,0 +1,86 @@
+"""Request coalescing for concurrent identical forecasts.
+
+The first caller for a key (the leader) runs the computation; callers that
+arrive with the same key while it is in flight (followers) wait for that
+result instead of computing it again. Nothing is kept once the leader
+finishes: this collapses bursts, ``ForecastCache`` covers later repeats.
+
+``do`` is for threads (forecast workers), ``do_async`` for the event loop;
+both share the in-flight table and the counters behind the coalescing ratio.
+Exceptions reach the leader and every follower alike.
+"""
+import asyncio
+import concurrent.futures
+import threading
+
+
+class SingleFlight:
+    """Per-key single-flight execution with leader / follower counters."""
+
+    def __init__(self):
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    def _join(self, key):
+        """``(future, leader)`` for ``key``, registering a new flight if there is none."""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.followers += 1
+                return future, False
+            future = self._in_flight[key] = concurrent.futures.Future()
+            self.leaders += 1
+            return future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            del self._in_flight[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn, *args):
+        """``fn(*args)``, or the result of the call already running for ``key``."""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def do_async(self, key, fn, *args):
+        """``await fn(*args)``, or the result of the coroutine already running for ``key``.
+
+        The coroutine runs as its own task, so a leader that is cancelled
+        (e.g. its client disconnected) does not fail the followers.
+        """
+        future, leader = self._join(key)
+        if leader:
+            task = asyncio.ensure_future(fn(*args))
+            task.add_done_callback(lambda task: self._finish_task(key, future, task))
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def _finish_task(self, key, future, task):
+        if task.cancelled():
+            self._finish(key, future, error=asyncio.CancelledError())
+        elif task.exception() is not None:
+            self._finish(key, future, error=task.exception())
+        else:
+            self._finish(key, future, task.result())
+
+    def stats(self):
+        with self._lock:
+            calls = self.leaders + self.followers
+            return {
+                "in_flight": len(self._in_flight),
+                "leaders": self.leaders,
+                "followers": self.followers,
+                "coalescing_ratio": self.followers / calls if calls else 0.0,
+            }
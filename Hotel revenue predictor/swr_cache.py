@@ -0,0 +1,68 @@
+"""Stale-while-revalidate cache for a single async-fetched value.
+
+Within ``fresh_seconds`` the cached value is returned as is. Until
+``fresh_seconds + stale_seconds`` it is still returned immediately, but a
+background refresh is started. After that, or before the first fetch, callers
+wait for a refresh. Concurrent refreshes are collapsed into one, and a failed
+background refresh keeps serving the old value.
+"""
+import asyncio
+import time
+
+
+class StaleWhileRevalidateCache:
+    def __init__(self, fetch, fresh_seconds=60.0, stale_seconds=600.0, clock=time.monotonic):
+        self._fetch = fetch
+        self.fresh_seconds = fresh_seconds
+        self.stale_seconds = stale_seconds
+        self._clock = clock
+        self._value = None
+        self._fetched_at = None
+        self._refresh_task = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refresh_errors = 0
+
+    async def _refresh(self):
+        try:
+            value = await self._fetch()
+        except Exception:
+            self.refresh_errors += 1
+            raise
+        self._value = value
+        self._fetched_at = self._clock()
+        return value
+
+    def _start_refresh(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh())
+            # Background failures are counted in refresh_errors; don't log them as unretrieved.
+            self._refresh_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return self._refresh_task
+
+    async def get(self):
+        if self._fetched_at is not None:
+            age = self._clock() - self._fetched_at
+            if age < self.fresh_seconds:
+                self.hits += 1
+                return self._value
+            if age < self.fresh_seconds + self.stale_seconds:
+                self.stale_hits += 1
+                self._start_refresh()
+                return self._value
+        self.misses += 1
+        return await asyncio.shield(self._start_refresh())
+
+    def invalidate(self):
+        self._fetched_at = None
+
+    def stats(self):
+        return {
+            "cached": self._fetched_at is not None,
+            "age_seconds": None if self._fetched_at is None else self._clock() - self._fetched_at,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refresh_errors": self.refresh_errors,
+        }